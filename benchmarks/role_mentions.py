@@ -0,0 +1,74 @@
+"""Microbenchmark: Kosten der Rollen-Erwähnungs-Prüfung in on_message pro Nachricht.
+
+Vergleicht die frühere Prüfung (Sets pro Nachricht, lineare Rollensuche) mit dem BotRoleCache.
+Läuft ohne Discord-Verbindung und ohne Token:
+
+    python benchmarks/role_mentions.py [--roles 250] [--bot-roles 5] [--number 200000]
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+from types import SimpleNamespace
+
+# bot_roles importiert kein discord.py und lässt sich daher ohne das Paket laden
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "discord_mcp"))
+from bot_roles import BotRoleCache  # noqa: E402
+
+GUILD_ID = 1 << 40
+BOT_ID = 2 << 40
+
+
+def build_guild(role_count: int, bot_role_count: int):
+    roles = [SimpleNamespace(id=GUILD_ID + i, mention=f"<@&{GUILD_ID + i}>") for i in range(role_count)]
+    by_id = {role.id: role for role in roles}
+    me = SimpleNamespace(id=BOT_ID, roles=roles[:1] + roles[-bot_role_count:])
+    guild = SimpleNamespace(id=GUILD_ID, roles=roles, me=me, get_role=by_id.get, get_member=lambda _: me)
+    return guild, roles
+
+
+def old_check(message):
+    mentioned_roles = set(role.id for role in message.role_mentions)
+    bot_roles = set(role.id for role in message.guild.get_member(BOT_ID).roles)
+    if mentioned_roles & bot_roles:
+        role_id = (mentioned_roles & bot_roles).pop()
+        return next((role for role in message.guild.roles if role.id == role_id), None)
+    return None
+
+
+def new_check(cache: BotRoleCache, message):
+    if message.role_mentions:
+        role_id = cache.first_match(message.guild.id, [role.id for role in message.role_mentions])
+        if role_id is not None:
+            return message.guild.get_role(role_id)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--roles", type=int, default=250, help="Rollen im Server")
+    parser.add_argument("--bot-roles", type=int, default=5, help="Rollen des Bots")
+    parser.add_argument("--number", type=int, default=200000, help="Nachrichten pro Messung")
+    args = parser.parse_args()
+
+    guild, roles = build_guild(args.roles, args.bot_roles)
+    cache = BotRoleCache()
+    cache.set(guild.id, [role.id for role in guild.me.roles[1:]])
+
+    cases = {
+        "no role mention": [],
+        "other role mentioned": [roles[1]],
+        "bot role mentioned": [roles[1], roles[-1]],
+    }
+    print(f"{args.roles} roles, bot has {args.bot_roles}, {args.number} messages per case")
+    print(f"{'case':<24}{'before (ns/msg)':>18}{'after (ns/msg)':>18}")
+    for name, mentions in cases.items():
+        message = SimpleNamespace(guild=guild, role_mentions=mentions)
+        assert old_check(message) is new_check(cache, message)
+        before = timeit.timeit(lambda: old_check(message), number=args.number) / args.number * 1e9
+        after = timeit.timeit(lambda: new_check(cache, message), number=args.number) / args.number * 1e9
+        print(f"{name:<24}{before:>18.0f}{after:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,13 @@ setup(
     packages=find_namespace_packages(where="src"),
     package_dir={"": "src"},
     install_requires=[
-        "discord.py>=2.3.2",
+        "discord.py>=2.4.0",
         "PyNaCl>=1.5.0",
         "python-dotenv>=1.0.0"
     ],
+    extras_require={
+        "fast": ["orjson>=3.9"],
+    },
     entry_points={
         'console_scripts': [
             'discord-mcp=discord_mcp:main',
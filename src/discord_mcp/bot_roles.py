@@ -0,0 +1,39 @@
+"""Rollen-IDs des Bots pro Server, damit on_message Rollen-Erwähnungen ohne Suche prüfen kann"""
+from typing import Dict, FrozenSet, Iterable, Optional
+
+_EMPTY: FrozenSet[int] = frozenset()
+
+
+class BotRoleCache:
+    """Wird über Gateway-Events (eigenes Member-Update, Rollen-Events, Server-Beitritt) gepflegt.
+
+    Arbeitet nur mit IDs, damit der Cache unabhängig von discord.py bleibt.
+    """
+    def __init__(self):
+        self._roles: Dict[int, FrozenSet[int]] = {}
+
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self._roles
+
+    def set(self, guild_id: int, role_ids: Iterable[int]) -> None:
+        self._roles[guild_id] = frozenset(role_ids)
+
+    def drop(self, guild_id: int) -> None:
+        self._roles.pop(guild_id, None)
+
+    def remove_role(self, guild_id: int, role_id: int) -> None:
+        roles = self._roles.get(guild_id)
+        if roles is not None and role_id in roles:
+            self._roles[guild_id] = roles - {role_id}
+
+    def get(self, guild_id: int) -> FrozenSet[int]:
+        return self._roles.get(guild_id, _EMPTY)
+
+    def first_match(self, guild_id: int, role_ids: Iterable[int]) -> Optional[int]:
+        """Erste der erwähnten Rollen, die der Bot hat"""
+        roles = self._roles.get(guild_id)
+        if roles:
+            for role_id in role_ids:
+                if role_id in roles:
+                    return role_id
+        return None
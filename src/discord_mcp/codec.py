@@ -0,0 +1,108 @@
+"""JSON-Codecs für das MCP-Protokoll: orjson / msgspec wenn installiert, sonst stdlib"""
+import json
+import os
+from dataclasses import is_dataclass
+from typing import Any, Optional, Tuple, Type
+
+
+def _default(obj: Any) -> Any:
+    """Dataclasses flach serialisieren statt asdict() (kein rekursives Deep-Copy)"""
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return vars(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class StdlibCodec:
+    """Fallback auf das json-Modul der Standardbibliothek"""
+    name = "json"
+    decode_errors: Tuple[Type[Exception], ...] = (json.JSONDecodeError, UnicodeDecodeError)
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder(default=_default)
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj).encode('utf-8')
+
+    def encode_line(self, obj: Any) -> bytes:
+        """Serialisiert obj als eine Zeile inklusive abschließendem Newline"""
+        return (self._encoder.encode(obj) + '\n').encode('utf-8')
+
+
+class OrjsonCodec:
+    """orjson: serialisiert Dataclasses nativ und hängt das Newline direkt an"""
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        self.decode_errors = (orjson.JSONDecodeError,)
+
+    def loads(self, data: bytes) -> Any:
+        return self._orjson.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._orjson.dumps(obj)
+
+    def encode_line(self, obj: Any) -> bytes:
+        return self._orjson.dumps(obj, option=self._orjson.OPT_APPEND_NEWLINE)
+
+
+class MsgspecCodec:
+    """msgspec: kodiert direkt in einen Puffer, an den das Newline angehängt wird"""
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+        self.decode_errors = (msgspec.DecodeError,)
+
+    def loads(self, data: bytes) -> Any:
+        return self._decoder.decode(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def encode_line(self, obj: Any) -> bytearray:
+        buffer = bytearray()
+        self._encoder.encode_into(obj, buffer)
+        buffer.extend(b'\n')
+        return buffer
+
+
+_CODECS = {
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+    "json": StdlibCodec,
+}
+
+_default_codec = None
+
+
+def get_codec(name: Optional[str] = None):
+    """Wählt den Codec per Name oder MCP_JSON_CODEC ("auto" = schnellster verfügbarer)"""
+    global _default_codec
+    if name is None and _default_codec is not None:
+        return _default_codec
+
+    choice = (name or os.getenv("MCP_JSON_CODEC", "auto")).lower()
+    if choice == "auto":
+        codec = None
+        for factory in (OrjsonCodec, MsgspecCodec):
+            try:
+                codec = factory()
+                break
+            except ImportError:
+                continue
+        codec = codec or StdlibCodec()
+    elif choice in _CODECS:
+        codec = _CODECS[choice]()
+    else:
+        raise ValueError(f"Unknown JSON codec: {choice}")
+
+    if name is None:
+        _default_codec = codec
+    return codec
@@ -0,0 +1,209 @@
+"""Resolver für Discord-Entitäten: Gateway-Cache -> TTL/LRU-Cache -> REST"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class TTLCache:
+    """Kleiner LRU-Cache mit Ablaufzeit pro Eintrag"""
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> bool:
+        return self._data.pop(key, None) is not None
+
+    def pop_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Entfernt alle Einträge deren Schlüssel das Prädikat erfüllt"""
+        keys = [key for key in self._data if predicate(key)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class EntityResolver:
+    """Löst Channels, Guilds, User, Member und Nachrichten mit möglichst wenig REST-Calls auf"""
+
+    KINDS = ("channel", "guild", "user", "member", "message")
+    # REST-Route pro Entitätstyp (für den RestScheduler)
+    ROUTES = {
+        "channel": "GET /channels/{channel_id}",
+        "guild": "GET /guilds/{guild_id}",
+        "user": "GET /users/{user_id}",
+        "member": "GET /guilds/{guild_id}/members/{user_id}",
+        "message": "GET /channels/{channel_id}/messages/{message_id}",
+    }
+
+    def __init__(self, client: Any, ttl: float = 300.0, maxsize: int = 1024, scheduler: Any = None):
+        self.client = client
+        self.scheduler = scheduler
+        self._caches: Dict[str, TTLCache] = {kind: TTLCache(maxsize, ttl) for kind in self.KINDS}
+        # Laufende REST-Abfragen, damit parallele Aufrufe sich einen Request teilen
+        self._pending: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        self.stats: Dict[str, int] = {
+            "gateway_hits": 0,
+            "cache_hits": 0,
+            "coalesced": 0,
+            "misses": 0,
+            "invalidations": 0,
+        }
+
+    async def _resolve(
+        self,
+        kind: str,
+        key: Hashable,
+        from_gateway: Callable[[], Any],
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        obj = from_gateway()
+        if obj is not None:
+            self.stats["gateway_hits"] += 1
+            return obj
+
+        cache = self._caches[kind]
+        obj = cache.get(key)
+        if obj is not None:
+            self.stats["cache_hits"] += 1
+            return obj
+
+        pending = self._pending.get((kind, key))
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[(kind, key)] = future
+        try:
+            if self.scheduler is None:
+                obj = await fetch()
+            else:
+                # Major-Parameter ist die Guild- bzw. Channel-ID
+                major = key[0] if isinstance(key, tuple) else key
+                obj = await self.scheduler.request(self.ROUTES[kind], major, fetch)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Exception als abgerufen markieren, falls niemand wartet
+            future.exception()
+            raise
+        else:
+            cache.set(key, obj)
+            future.set_result(obj)
+            return obj
+        finally:
+            del self._pending[(kind, key)]
+
+    async def channel(self, channel_id: int) -> Any:
+        return await self._resolve(
+            "channel", channel_id,
+            lambda: self.client.get_channel(channel_id),
+            lambda: self.client.fetch_channel(channel_id),
+        )
+
+    async def guild(self, guild_id: int) -> Any:
+        return await self._resolve(
+            "guild", guild_id,
+            lambda: self.client.get_guild(guild_id),
+            lambda: self.client.fetch_guild(guild_id),
+        )
+
+    async def user(self, user_id: int) -> Any:
+        return await self._resolve(
+            "user", user_id,
+            lambda: self.client.get_user(user_id),
+            lambda: self.client.fetch_user(user_id),
+        )
+
+    async def member(self, guild: Any, user_id: int) -> Any:
+        return await self._resolve(
+            "member", (guild.id, user_id),
+            lambda: guild.get_member(user_id),
+            lambda: guild.fetch_member(user_id),
+        )
+
+    async def message(self, channel_id: int, message_id: int) -> Any:
+        channel = await self.channel(channel_id)
+        return await self._resolve(
+            "message", (channel_id, message_id),
+            lambda: self._cached_message(channel_id, message_id),
+            lambda: channel.fetch_message(message_id),
+        )
+
+    def _cached_message(self, channel_id: int, message_id: int) -> Any:
+        """Sucht die Nachricht im Nachrichten-Cache des Gateways"""
+        state = getattr(self.client, "_connection", None)
+        if state is None:
+            return None
+        message = state._get_message(message_id)
+        if message is not None and message.channel.id == channel_id:
+            return message
+        return None
+
+    # Invalidierung durch Gateway-Events
+    def _invalidate(self, kind: str, key: Hashable) -> None:
+        if self._caches[kind].pop(key):
+            self.stats["invalidations"] += 1
+
+    def invalidate_channel(self, channel_id: int) -> None:
+        self._invalidate("channel", channel_id)
+        self.stats["invalidations"] += self._caches["message"].pop_where(lambda key: key[0] == channel_id)
+
+    def invalidate_guild(self, guild_id: int) -> None:
+        self._invalidate("guild", guild_id)
+        self.stats["invalidations"] += self._caches["member"].pop_where(lambda key: key[0] == guild_id)
+
+    def invalidate_user(self, user_id: int) -> None:
+        self._invalidate("user", user_id)
+        self.stats["invalidations"] += self._caches["member"].pop_where(lambda key: key[1] == user_id)
+
+    def invalidate_member(self, guild_id: int, user_id: int) -> None:
+        self._invalidate("member", (guild_id, user_id))
+
+    def invalidate_message(self, channel_id: int, message_id: int) -> None:
+        self._invalidate("message", (channel_id, message_id))
+
+    def clear(self) -> None:
+        for cache in self._caches.values():
+            cache.clear()
+
+    def report(self) -> Dict[str, Any]:
+        """Trefferzähler und Cache-Größen"""
+        lookups = self.stats["gateway_hits"] + self.stats["cache_hits"] + self.stats["coalesced"] + self.stats["misses"]
+        saved = lookups - self.stats["misses"]
+        return {
+            **self.stats,
+            "lookups": lookups,
+            "round_trips_saved": saved,
+            "hit_ratio": round(saved / lookups, 3) if lookups else 0.0,
+            "sizes": {kind: len(cache) for kind, cache in self._caches.items()},
+        }
@@ -0,0 +1,82 @@
+"""Reverse-Index über Mitgliedschaften: User -> Server und Rolle -> Mitglieder"""
+from typing import Dict, FrozenSet, Iterable, Set, Tuple
+
+_EMPTY: FrozenSet[int] = frozenset()
+
+
+class MemberIndex:
+    """Wird über Gateway-Events aktuell gehalten, damit Rollen-Abfragen nicht jeden Server durchsuchen.
+
+    Arbeitet nur mit IDs, damit der Index unabhängig von discord.py bleibt.
+    """
+    def __init__(self):
+        self._guilds_by_user: Dict[int, Set[int]] = {}
+        # Rollen-IDs sind global eindeutig, daher ohne Guild-ID als Schlüssel
+        self._members_by_role: Dict[int, Set[int]] = {}
+        self._roles: Dict[Tuple[int, int], Tuple[int, ...]] = {}
+        self._members_by_guild: Dict[int, Set[int]] = {}
+
+    def add_member(self, guild_id: int, user_id: int, role_ids: Iterable[int]) -> None:
+        """Nimmt ein Mitglied auf oder ersetzt dessen Rollen"""
+        key = (guild_id, user_id)
+        role_ids = tuple(role_ids)
+        old = self._roles.get(key, ())
+        for role_id in old:
+            if role_id not in role_ids:
+                self._discard(self._members_by_role, role_id, user_id)
+        for role_id in role_ids:
+            self._members_by_role.setdefault(role_id, set()).add(user_id)
+        self._roles[key] = role_ids
+        self._guilds_by_user.setdefault(user_id, set()).add(guild_id)
+        self._members_by_guild.setdefault(guild_id, set()).add(user_id)
+
+    def remove_member(self, guild_id: int, user_id: int) -> None:
+        for role_id in self._roles.pop((guild_id, user_id), ()):
+            self._discard(self._members_by_role, role_id, user_id)
+        self._discard(self._guilds_by_user, user_id, guild_id)
+        self._discard(self._members_by_guild, guild_id, user_id)
+
+    def add_guild(self, guild_id: int, members: Iterable[Tuple[int, Iterable[int]]]) -> None:
+        """Indiziert alle (user_id, role_ids) eines Servers neu"""
+        self.remove_guild(guild_id)
+        for user_id, role_ids in members:
+            self.add_member(guild_id, user_id, role_ids)
+
+    def remove_guild(self, guild_id: int) -> None:
+        for user_id in list(self._members_by_guild.get(guild_id, ())):
+            self.remove_member(guild_id, user_id)
+
+    def remove_role(self, role_id: int) -> None:
+        """Entfernt eine gelöschte Rolle aus dem Index"""
+        for user_id in self._members_by_role.pop(role_id, ()):
+            for guild_id in self._guilds_by_user.get(user_id, ()):
+                key = (guild_id, user_id)
+                roles = self._roles.get(key)
+                if roles is not None and role_id in roles:
+                    self._roles[key] = tuple(r for r in roles if r != role_id)
+
+    def has_member(self, guild_id: int, user_id: int) -> bool:
+        return (guild_id, user_id) in self._roles
+
+    def guilds_of(self, user_id: int) -> FrozenSet[int]:
+        """Gemeinsame Server eines Users"""
+        return frozenset(self._guilds_by_user.get(user_id, _EMPTY))
+
+    def members_with_role(self, role_id: int) -> FrozenSet[int]:
+        return frozenset(self._members_by_role.get(role_id, _EMPTY))
+
+    def report(self) -> Dict[str, int]:
+        return {
+            "guilds": len(self._members_by_guild),
+            "users": len(self._guilds_by_user),
+            "memberships": len(self._roles),
+            "roles": len(self._members_by_role),
+        }
+
+    @staticmethod
+    def _discard(index: Dict[int, Set[int]], key: int, value: int) -> None:
+        values = index.get(key)
+        if values is not None:
+            values.discard(value)
+            if not values:
+                del index[key]
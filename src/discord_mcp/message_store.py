@@ -0,0 +1,473 @@
+"""Lokaler Nachrichtenspeicher (SQLite, WAL) mit inkrementellem Sync pro Channel"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger("discord-mcp-server")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    guild_id INTEGER,
+    author_id INTEGER,
+    author TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    reactions TEXT NOT NULL DEFAULT '[]',
+    PRIMARY KEY (channel_id, message_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS messages_author ON messages (author_id, message_id);
+-- Für die Aufbewahrungsgrenze (älteste Nachrichten über alle Channels)
+CREATE INDEX IF NOT EXISTS messages_id ON messages (message_id);
+
+-- Zusammenhängender, vollständig bekannter Bereich der History pro Channel
+CREATE TABLE IF NOT EXISTS channel_sync (
+    channel_id INTEGER PRIMARY KEY,
+    oldest_id INTEGER NOT NULL,
+    newest_id INTEGER NOT NULL,
+    complete INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Volltextindex (FTS5), per Trigger synchron zur messages-Tabelle; rowid = Message-ID
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE messages_fts USING fts5(
+    content,
+    channel_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content, channel_id) VALUES (new.message_id, new.content, new.channel_id);
+END;
+
+CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN
+    DELETE FROM messages_fts WHERE rowid = old.message_id;
+END;
+
+CREATE TRIGGER messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+    UPDATE messages_fts SET content = new.content WHERE rowid = new.message_id;
+END;
+
+INSERT INTO messages_fts (rowid, content, channel_id) SELECT message_id, content, channel_id FROM messages;
+"""
+
+# Zeile aus der messages-Tabelle: (message_id, author, created_at, content, reactions)
+StoredMessage = Tuple[int, str, str, str, List[Tuple[str, int]]]
+# Suchtreffer: (message_id, channel_id, author, created_at, snippet)
+SearchHit = Tuple[int, int, str, str, str]
+
+# Discord-Epoche (2015-01-01) in Millisekunden, für Snowflake-Grenzen
+_DISCORD_EPOCH_MS = 1420070400000
+
+
+class MessageStore:
+    """Speichert Channel-History lokal, damit read_messages nur die Lücke remote holen muss.
+
+    Pro Channel wird ein zusammenhängender Bereich (oldest_id..newest_id) geführt, in dem
+    keine Nachricht fehlt. Solange der Bot seit dem letzten Sync verbunden ist ("live"),
+    erweitern Gateway-Nachrichten diesen Bereich direkt; nach einem Disconnect wird die
+    Lücke beim nächsten Lesen nachgeladen.
+
+    Schreibzugriffe aus Gateway-Events werden gepuffert und von run() gebündelt in einem
+    Thread geschrieben; Lese- und direkte Schreibzugriffe schreiben den Puffer vorher fest.
+    Alle Zugriffe auf die Verbindung laufen unter _lock, damit kein Lesezugriff in die offene
+    Transaktion des Schreib-Threads gerät.
+    """
+    def __init__(self, path: str, batch_size: int = 500):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # Reentrant: flush() führt die gepufferten Schreibmethoden unter derselben Sperre aus
+        self._lock = threading.RLock()
+        self.batch_size = batch_size
+        self._pending: List[Tuple[Callable[..., Any], tuple]] = []
+        # Schützt nur den Puffer, damit Gateway-Events nicht auf einen laufenden Flush warten
+        self._pending_lock = threading.Lock()
+        self._pending_full = asyncio.Event()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Damit INSERT OR REPLACE auch den Delete-Trigger des Volltextindex auslöst
+        self._conn.execute("PRAGMA recursive_triggers=ON")
+        self._conn.executescript(_SCHEMA)
+        self.fts = self._init_fts()
+        # Channels, deren Bereich seit dem letzten Sync lückenlos per Gateway fortgeschrieben wird
+        self._live: Set[int] = set()
+        self._closed = False
+        self.stats: Dict[str, int] = {"reads": 0, "remote_fetches": 0, "stored": 0, "flushes": 0, "pruned": 0}
+
+    def _init_fts(self) -> bool:
+        """Legt den FTS5-Index an (und füllt ihn aus bestehenden Nachrichten); False ohne FTS5"""
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+        ).fetchone()
+        if exists:
+            return True
+        try:
+            self._conn.executescript("BEGIN;" + _FTS_SCHEMA + "COMMIT;")
+            return True
+        except sqlite3.OperationalError as e:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            logger.warning(f"SQLite FTS5 not available, falling back to LIKE search: {e}")
+            return False
+
+    # Gepufferte Schreibzugriffe
+    def enqueue(self, method: Callable[..., Any], *args: Any) -> None:
+        """Puffert einen Schreibzugriff (z.B. aus einem Gateway-Event) für den nächsten Flush"""
+        with self._pending_lock:
+            self._pending.append((method, args))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._pending_full.set()
+
+    def flush(self) -> int:
+        """Schreibt alle gepufferten Zugriffe in einer Transaktion; Anzahl der Zugriffe"""
+        with self._lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return 0
+            self._conn.execute("BEGIN")
+            try:
+                for method, args in pending:
+                    method(*args)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        self.stats["flushes"] += 1
+        return len(pending)
+
+    def _flush_pending(self) -> None:
+        # Während eines Flushs (gleicher Thread, RLock) nicht erneut flushen
+        if self._pending and not self._conn.in_transaction:
+            self.flush()
+
+    async def run(self, interval: float = 1.0, max_age_days: float = 0, max_rows: int = 0, prune_interval: float = 600) -> None:
+        """Schreibt den Puffer periodisch im Thread-Pool und setzt die Aufbewahrungsgrenzen durch"""
+        next_prune = time.monotonic()
+        while True:
+            try:
+                await asyncio.wait_for(self._pending_full.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self._pending_full.clear()
+            try:
+                if self._pending:
+                    await asyncio.to_thread(self.flush)
+                if (max_age_days or max_rows) and time.monotonic() >= next_prune:
+                    next_prune = time.monotonic() + prune_interval
+                    await asyncio.to_thread(self.prune, max_age_days, max_rows)
+            except sqlite3.Error as e:
+                logger.error(f"Message store write failed: {e}", exc_info=True)
+
+    def prune(self, max_age_days: float = 0, max_rows: int = 0, batch_rows: int = 5000) -> int:
+        """Löscht Nachrichten älter als max_age_days bzw. über max_rows hinaus; Anzahl gelöschter Zeilen.
+
+        Gelöscht wird in Transaktionen zu je batch_rows Zeilen; dazwischen wird die Sperre
+        freigegeben, damit Lesezugriffe der Event-Loop nicht auf den ganzen Durchlauf warten.
+        """
+        cutoff = 0
+        if max_age_days:
+            cutoff_ms = int((time.time() - max_age_days * 86400) * 1000) - _DISCORD_EPOCH_MS
+            cutoff = max(0, cutoff_ms) << 22
+        with self._lock:
+            self._flush_pending()
+            if max_rows:
+                row = self._conn.execute(
+                    "SELECT message_id FROM messages ORDER BY message_id DESC LIMIT 1 OFFSET ?", (max_rows - 1,)
+                ).fetchone()
+                if row is not None:
+                    cutoff = max(cutoff, row[0])
+            if not cutoff:
+                return 0
+            # Sync-Bereiche zuerst verkleinern: sie dürfen nichts Gelöschtes mehr abdecken,
+            # älteres muss neu geladen werden
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM channel_sync WHERE newest_id < ?", (cutoff,))
+            self._conn.execute(
+                "UPDATE channel_sync SET oldest_id = ?, complete = 0 WHERE oldest_id < ?", (cutoff, cutoff)
+            )
+            self._conn.execute("COMMIT")
+
+        deleted = 0
+        while not self._closed:
+            with self._lock:
+                if self._closed:
+                    break
+                self._flush_pending()
+                self._conn.execute("BEGIN")
+                batch = self._conn.execute(
+                    "DELETE FROM messages WHERE (channel_id, message_id) IN "
+                    "(SELECT channel_id, message_id FROM messages WHERE message_id < ? LIMIT ?)",
+                    (cutoff, batch_rows),
+                ).rowcount
+                self._conn.execute("COMMIT")
+            deleted += batch
+            if batch < batch_rows:
+                break
+        if deleted:
+            self.stats["pruned"] += deleted
+            logger.info(f"Pruned {deleted} messages from the message store")
+        return deleted
+
+    # Schreiben
+    @staticmethod
+    def _row(message: Any, reactions: List[Tuple[str, int]]) -> tuple:
+        guild = getattr(message, "guild", None)
+        return (
+            message.channel.id,
+            message.id,
+            guild.id if guild else None,
+            message.author.id,
+            str(message.author),
+            message.content,
+            message.created_at.isoformat(),
+            json.dumps(reactions),
+        )
+
+    def upsert(self, messages: Iterable[Tuple[Any, List[Tuple[str, int]]]]) -> int:
+        """Speichert (Nachricht, Reaktionen)-Paare"""
+        rows = [self._row(message, reactions) for message, reactions in messages]
+        if not rows:
+            return 0
+        with self._lock:
+            self._flush_pending()
+            # Innerhalb eines Flushs läuft bereits eine Transaktion
+            own_transaction = not self._conn.in_transaction
+            if own_transaction:
+                self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            if own_transaction:
+                self._conn.execute("COMMIT")
+        self.stats["stored"] += len(rows)
+        return len(rows)
+
+    def update_content(self, channel_id: int, message_id: int, content: str) -> None:
+        with self._lock:
+            self._flush_pending()
+            self._conn.execute(
+                "UPDATE messages SET content = ? WHERE channel_id = ? AND message_id = ?",
+                (content, channel_id, message_id),
+            )
+
+    def delete(self, channel_id: int, message_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._flush_pending()
+            self._conn.executemany(
+                "DELETE FROM messages WHERE channel_id = ? AND message_id = ?",
+                [(channel_id, message_id) for message_id in message_ids],
+            )
+
+    def adjust_reaction(self, channel_id: int, message_id: int, emoji: str, delta: int) -> None:
+        """Passt den Zähler einer Reaktion an (aus Raw-Reaction-Events)"""
+        with self._lock:
+            self._flush_pending()
+            row = self._conn.execute(
+                "SELECT reactions FROM messages WHERE channel_id = ? AND message_id = ?",
+                (channel_id, message_id),
+            ).fetchone()
+            if row is None:
+                return
+            counts = dict((name, count) for name, count in json.loads(row[0]))
+            counts[emoji] = counts.get(emoji, 0) + delta
+            reactions = [[name, count] for name, count in counts.items() if count > 0]
+            self._conn.execute(
+                "UPDATE messages SET reactions = ? WHERE channel_id = ? AND message_id = ?",
+                (json.dumps(reactions), channel_id, message_id),
+            )
+
+    def drop_sync_range(self, channel_id: int) -> None:
+        """Verwirft den Sync-Bereich (die Nachrichten selbst bleiben erhalten)"""
+        self._live.discard(channel_id)
+        with self._lock:
+            self._flush_pending()
+            self._conn.execute("DELETE FROM channel_sync WHERE channel_id = ?", (channel_id,))
+
+    def drop_channel(self, channel_id: int) -> None:
+        self._live.discard(channel_id)
+        with self._lock:
+            self._flush_pending()
+            self._conn.execute("DELETE FROM messages WHERE channel_id = ?", (channel_id,))
+            self._conn.execute("DELETE FROM channel_sync WHERE channel_id = ?", (channel_id,))
+
+    # Sync-Bereich
+    def sync_range(self, channel_id: int) -> Optional[Tuple[int, int, bool]]:
+        rows = self._query(
+            "SELECT oldest_id, newest_id, complete FROM channel_sync WHERE channel_id = ?", (channel_id,)
+        )
+        if not rows:
+            return None
+        oldest_id, newest_id, complete = rows[0]
+        return oldest_id, newest_id, bool(complete)
+
+    def set_sync_range(self, channel_id: int, oldest_id: int, newest_id: int, complete: bool = False) -> None:
+        with self._lock:
+            self._flush_pending()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO channel_sync VALUES (?, ?, ?, ?)",
+                (channel_id, oldest_id, newest_id, int(complete)),
+            )
+
+    def extend_sync_range(
+        self,
+        channel_id: int,
+        oldest_id: Optional[int] = None,
+        newest_id: Optional[int] = None,
+        complete: Optional[bool] = None,
+    ) -> None:
+        """Erweitert einen bestehenden Bereich, ohne ihn je zu verkleinern"""
+        with self._lock:
+            self._flush_pending()
+            row = self._conn.execute(
+                "SELECT oldest_id, newest_id, complete FROM channel_sync WHERE channel_id = ?",
+                (channel_id,),
+            ).fetchone()
+            if row is None:
+                return
+            self._conn.execute(
+                "UPDATE channel_sync SET oldest_id = ?, newest_id = ?, complete = ? WHERE channel_id = ?",
+                (
+                    row[0] if oldest_id is None else min(row[0], oldest_id),
+                    row[1] if newest_id is None else max(row[1], newest_id),
+                    row[2] if complete is None else int(complete),
+                    channel_id,
+                ),
+            )
+
+    def is_live(self, channel_id: int) -> bool:
+        return channel_id in self._live
+
+    def mark_live(self, channel_id: int) -> None:
+        self._live.add(channel_id)
+
+    def mark_all_stale(self) -> None:
+        """Nach einem Gateway-Disconnect können Nachrichten fehlen"""
+        self._live.clear()
+
+    def on_gateway_message(self, message: Any, reactions: List[Tuple[str, int]]) -> None:
+        """Neue Nachricht vom Gateway; erweitert den Bereich nur bei lückenloser Verbindung"""
+        channel_id = message.channel.id
+        self.enqueue(self.upsert, [(message, reactions)])
+        if channel_id in self._live:
+            self.enqueue(self.extend_sync_range, channel_id, None, message.id)
+
+    # Lesen
+    def read(
+        self,
+        channel_id: int,
+        limit: int,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> List[StoredMessage]:
+        """Nachrichten aus dem Speicher, neueste zuerst (mit after: älteste zuerst)"""
+        self.stats["reads"] += 1
+        query = "SELECT message_id, author, created_at, content, reactions FROM messages WHERE channel_id = ?"
+        params: List[Any] = [channel_id]
+        if before is not None:
+            query += " AND message_id < ?"
+            params.append(before)
+        if after is not None:
+            query += " AND message_id > ?"
+            params.append(after)
+        query += " ORDER BY message_id " + ("ASC" if after is not None else "DESC") + " LIMIT ?"
+        params.append(limit)
+        rows = self._query(query, params)
+        return [
+            (message_id, author, created_at, content, [tuple(r) for r in json.loads(reactions)])
+            for message_id, author, created_at, content, reactions in rows
+        ]
+
+    @staticmethod
+    def _match_query(query: str) -> str:
+        """Macht aus freiem Text eine FTS5-Abfrage: jedes Wort als Phrase, Wort* als Präfix"""
+        terms = []
+        for term in query.split():
+            prefix = term.endswith("*") and len(term) > 1
+            term = term.rstrip("*").replace('"', '""')
+            if term:
+                terms.append(f'"{term}"*' if prefix else f'"{term}"')
+        return " ".join(terms)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 25,
+        channel_id: Optional[int] = None,
+        guild_id: Optional[int] = None,
+        author_id: Optional[int] = None,
+        min_id: Optional[int] = None,
+        max_id: Optional[int] = None,
+    ) -> List[SearchHit]:
+        """Volltextsuche, nach Relevanz (bm25) sortiert; Zeitfilter als Snowflake-Grenzen"""
+        filters = []
+        params: List[Any] = []
+        for column, value in (("m.channel_id", channel_id), ("m.guild_id", guild_id), ("m.author_id", author_id)):
+            if value is not None:
+                filters.append(f"{column} = ?")
+                params.append(value)
+        if min_id is not None:
+            filters.append("m.message_id >= ?")
+            params.append(min_id)
+        if max_id is not None:
+            filters.append("m.message_id <= ?")
+            params.append(max_id)
+        where = "".join(" AND " + f for f in filters)
+
+        if self.fts:
+            match = self._match_query(query)
+            if not match:
+                return []
+            sql = (
+                "SELECT m.message_id, m.channel_id, m.author, m.created_at, "
+                "snippet(messages_fts, 0, '**', '**', '…', 24) "
+                "FROM messages_fts f JOIN messages m "
+                "ON m.channel_id = f.channel_id AND m.message_id = f.rowid "
+                "WHERE messages_fts MATCH ?" + where +
+                " ORDER BY bm25(messages_fts), m.message_id DESC LIMIT ?"
+            )
+            return self._query(sql, [match, *params, limit])
+
+        # Fallback ohne FTS5: alle Wörter müssen enthalten sein, neueste zuerst
+        terms = [term.rstrip("*") for term in query.split() if term.rstrip("*")]
+        if not terms:
+            return []
+        like = "".join(" AND m.content LIKE ? ESCAPE '\\'" for _ in terms)
+        escaped = ["%" + t.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%" for t in terms]
+        sql = (
+            "SELECT m.message_id, m.channel_id, m.author, m.created_at, m.content "
+            "FROM messages m WHERE 1 = 1" + like + where +
+            " ORDER BY m.message_id DESC LIMIT ?"
+        )
+        return self._query(sql, [*escaped, *params, limit])
+
+    def count(self, channel_id: Optional[int] = None) -> int:
+        if channel_id is None:
+            return self._query("SELECT COUNT(*) FROM messages", ())[0][0]
+        return self._query("SELECT COUNT(*) FROM messages WHERE channel_id = ?", (channel_id,))[0][0]
+
+    def _query(self, sql: str, params: Iterable[Any]) -> List[tuple]:
+        """Lesezugriff nach dem Festschreiben des Puffers, unter der Sperre der Verbindung"""
+        with self._lock:
+            self._flush_pending()
+            return self._conn.execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error(f"Could not write pending messages on close: {e}")
+            self._conn.close()
@@ -0,0 +1,225 @@
+"""Metriken pro Tool: Latenz-Histogramme, Ergebnisse, In-Flight, Payload-Größen und REST-Calls"""
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("discord-mcp-server")
+
+LATENCY_BUCKETS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS: Tuple[float, ...] = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+COUNT_BUCKETS: Tuple[float, ...] = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+class Histogram:
+    """Histogramm mit festen Bucket-Grenzen wie bei Prometheus"""
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        # Letzter Bucket = +Inf
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Schätzt ein Quantil durch lineare Interpolation innerhalb des Buckets"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if index == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[index - 1] if index else 0.0
+                return lower + (self.bounds[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, kumulierte Anzahl) für die Prometheus-Ausgabe"""
+        result = []
+        total = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else f"{bound:g}", total))
+        return result
+
+
+class ToolStats:
+    """Gesammelte Werte für ein Tool"""
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.request_bytes = Histogram(SIZE_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+        self.rest_calls = Histogram(COUNT_BUCKETS)
+        self.outcomes: Dict[str, int] = {}
+        self.inflight = 0
+
+
+class ToolCall:
+    """Ein laufender Tool-Aufruf; REST-Calls werden über den Kontext zugeordnet"""
+    __slots__ = ("tool", "rest_calls", "response_bytes")
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.rest_calls = 0
+        self.response_bytes = 0
+
+
+class Metrics:
+    def __init__(self, prefix: str = "discord_mcp"):
+        self.prefix = prefix
+        self._tools: Dict[str, ToolStats] = {}
+        self._current: ContextVar[Optional[ToolCall]] = ContextVar("metrics_tool_call", default=None)
+        self._gauges: Dict[str, Tuple[str, Callable[[], Any]]] = {}
+        self.inflight = 0
+        self.rest_calls_outside_tools = 0
+
+    def _stats(self, tool: str) -> ToolStats:
+        stats = self._tools.get(tool)
+        if stats is None:
+            stats = self._tools[tool] = ToolStats()
+        return stats
+
+    @asynccontextmanager
+    async def track(self, tool: str, request_bytes: int = 0) -> AsyncIterator[ToolCall]:
+        """Misst einen Tool-Aufruf: Latenz, Ergebnis, Payload-Größen und REST-Calls"""
+        stats = self._stats(tool)
+        call = ToolCall(tool)
+        token = self._current.set(call)
+        self.inflight += 1
+        stats.inflight += 1
+        outcome = "error"
+        started = time.perf_counter()
+        try:
+            yield call
+            outcome = "ok"
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            stats.latency.observe(time.perf_counter() - started)
+            stats.outcomes[outcome] = stats.outcomes.get(outcome, 0) + 1
+            stats.request_bytes.observe(request_bytes)
+            stats.response_bytes.observe(call.response_bytes)
+            stats.rest_calls.observe(call.rest_calls)
+            stats.inflight -= 1
+            self.inflight -= 1
+            self._current.reset(token)
+
+    def count_rest_call(self, route: str) -> None:
+        """Hook für den RestScheduler: ordnet den REST-Call dem laufenden Tool-Aufruf zu"""
+        call = self._current.get()
+        if call is not None:
+            call.rest_calls += 1
+        else:
+            self.rest_calls_outside_tools += 1
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], Any]) -> None:
+        """Registriert einen Gauge, der beim Export ausgelesen wird"""
+        self._gauges[name] = (help_text, read)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Kennzahlen pro Tool für get_server_metrics"""
+        result = {}
+        for tool, stats in sorted(self._tools.items()):
+            calls = stats.latency.count
+            result[tool] = {
+                "calls": calls,
+                **stats.outcomes,
+                "inflight": stats.inflight,
+                "p50_ms": round(stats.latency.quantile(0.5) * 1000, 1),
+                "p99_ms": round(stats.latency.quantile(0.99) * 1000, 1),
+                "avg_rest_calls": round(stats.rest_calls.sum / calls, 2) if calls else 0.0,
+                "avg_response_bytes": round(stats.response_bytes.sum / calls) if calls else 0,
+            }
+        return result
+
+    def render(self) -> str:
+        """Prometheus-Textformat (Version 0.0.4)"""
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_tool_calls_total Tool calls by outcome",
+            f"# TYPE {p}_tool_calls_total counter",
+        ]
+        for tool, stats in sorted(self._tools.items()):
+            for outcome, count in sorted(stats.outcomes.items()):
+                lines.append(f'{p}_tool_calls_total{{tool="{tool}",outcome="{outcome}"}} {count}')
+
+        for name, attr, help_text in (
+            ("tool_latency_seconds", "latency", "Tool call latency"),
+            ("tool_request_bytes", "request_bytes", "Size of the request frame carrying the tool call"),
+            ("tool_response_bytes", "response_bytes", "Size of tool results"),
+            ("tool_rest_calls", "rest_calls", "Discord REST calls per tool call"),
+        ):
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} histogram")
+            for tool, stats in sorted(self._tools.items()):
+                histogram: Histogram = getattr(stats, attr)
+                for le, count in histogram.cumulative():
+                    lines.append(f'{p}_{name}_bucket{{tool="{tool}",le="{le}"}} {count}')
+                lines.append(f'{p}_{name}_sum{{tool="{tool}"}} {histogram.sum:g}')
+                lines.append(f'{p}_{name}_count{{tool="{tool}"}} {histogram.count}')
+
+        lines.append(f"# HELP {p}_tool_calls_inflight Tool calls currently running")
+        lines.append(f"# TYPE {p}_tool_calls_inflight gauge")
+        lines.append(f"{p}_tool_calls_inflight {self.inflight}")
+        lines.append(f"# HELP {p}_rest_calls_outside_tools_total REST calls not made by a tool call")
+        lines.append(f"# TYPE {p}_rest_calls_outside_tools_total counter")
+        lines.append(f"{p}_rest_calls_outside_tools_total {self.rest_calls_outside_tools}")
+        for name, (help_text, read) in self._gauges.items():
+            try:
+                value = read()
+            except Exception:
+                logger.debug(f"Failed to read gauge {name}", exc_info=True)
+                continue
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} gauge")
+            if isinstance(value, dict):
+                # Gauge mit Labels: {(label, wert): zahl}
+                for (label, label_value), number in value.items():
+                    lines.append(f'{p}_{name}{{{label}="{label_value}"}} {number:g}')
+            elif value is not None:
+                lines.append(f"{p}_{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host: str, port: int) -> asyncio.AbstractServer:
+        """Startet einen minimalen HTTP-Server, der /metrics ausliefert"""
+        server = await asyncio.start_server(self._handle_http, host, port)
+        logger.info(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+        return server
+
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            # Header überspringen
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request_line.split()
+            if len(parts) >= 2 and parts[0] == b'GET' and parts[1].split(b'?')[0] == b'/metrics':
+                status = b'200 OK'
+                content_type = b'text/plain; version=0.0.4; charset=utf-8'
+                body = self.render().encode('utf-8')
+            else:
+                status = b'404 Not Found'
+                content_type = b'text/plain'
+                body = b'Not Found\n'
+            writer.write(
+                b'HTTP/1.1 ' + status + b'\r\nContent-Type: ' + content_type
+                + b'\r\nContent-Length: %d\r\nConnection: close\r\n\r\n' % len(body) + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,272 @@
+"""Rate-Limit-bewusster Scheduler für Discord-REST-Calls mit Queues pro Route-Bucket"""
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger("discord-mcp-server")
+
+# Prioritäten: kleinere Werte werden zuerst bedient
+INTERACTIVE = 0
+BULK = 1
+
+# Geschätzte Discord-Limits pro Route: (Requests pro Sekunde, Burst). Die Werte sind fest
+# hinterlegt und werden nicht aus X-RateLimit-Bucket/-Remaining gelernt - die Header wertet
+# discord.py selbst aus und wartet bei erschöpften Buckets. Der Scheduler taktet vorher, damit
+# Bulk-Arbeit gar nicht erst in diese Wartezeiten (oder 429) läuft und Interaktives vorlässt.
+ROUTE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "POST /channels/{channel_id}/messages": (1.0, 5),
+    "DELETE /channels/{channel_id}/messages/{message_id}": (1.0, 5),
+    "POST /channels/{channel_id}/messages/bulk-delete": (1.0, 1),
+    "PUT /channels/{channel_id}/messages/{message_id}/reactions": (4.0, 1),
+    "DELETE /channels/{channel_id}/messages/{message_id}/reactions": (4.0, 1),
+    "GET /channels/{channel_id}/messages": (5.0, 5),
+    "PATCH /guilds/{guild_id}/members/{user_id}": (2.0, 10),
+    "PUT /guilds/{guild_id}/members/{user_id}/roles/{role_id}": (2.0, 10),
+    "DELETE /guilds/{guild_id}/members/{user_id}/roles/{role_id}": (2.0, 10),
+}
+DEFAULT_LIMIT: Tuple[float, int] = (5.0, 5)
+
+
+class TokenBucket:
+    """Token-Bucket mit optionaler Reserve für höher priorisierte Aufrufer"""
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, reserve: float = 0.0) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                await asyncio.sleep(self._blocked_until - now)
+                continue
+            self._refill(now)
+            if self.tokens - reserve >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 + reserve - self.tokens) / self.rate)
+
+    def block(self, seconds: float) -> None:
+        """Sperrt den Bucket nach einem 429 für retry_after Sekunden"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def idle(self) -> bool:
+        now = time.monotonic()
+        self._refill(now)
+        return now >= self._blocked_until and self.tokens >= self.capacity
+
+
+@dataclass
+class _Job:
+    factory: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    route: str
+    priority: int
+    enqueued: float = field(default_factory=time.monotonic)
+    retries: int = 0
+
+
+@dataclass
+class _RouteStats:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    rate_limited: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+
+class _Bucket:
+    def __init__(self, rate: float, burst: int, concurrency: int):
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self.limiter = TokenBucket(rate, burst)
+        self.slots = asyncio.Semaphore(concurrency)
+        self.worker: Optional[asyncio.Task] = None
+        self.in_flight = 0
+
+
+class RestScheduler:
+    """Alle REST-Calls der Tools laufen hierüber.
+
+    Jeder Route-Bucket (Route + Major-Parameter wie Channel- oder Guild-ID) hat eine eigene
+    Priority-Queue und ein eigenes Limit; zusätzlich gilt das globale Limit von Discord.
+    BULK-Aufrufe lassen einen Teil des globalen Budgets für INTERACTIVE-Aufrufe frei.
+    Identische laufende GETs fasst bereits der EntityResolver vor dem Scheduler zusammen.
+    """
+    def __init__(
+        self,
+        global_rate: float = 50.0,
+        bulk_reserve: float = 0.2,
+        concurrency: int = 4,
+        max_retries: int = 2,
+    ):
+        if global_rate <= 0:
+            raise ValueError(f"global_rate must be positive, got {global_rate}")
+        capacity = max(1, int(global_rate))
+        self._global = TokenBucket(global_rate, capacity)
+        # Die Reserve muss kleiner als die Kapazität bleiben, sonst bekommt BULK nie ein Token
+        self._bulk_reserve = min(global_rate * bulk_reserve, capacity - 1)
+        self._concurrency = concurrency
+        self._max_retries = max_retries
+        self._buckets: Dict[Tuple[str, Hashable], _Bucket] = {}
+        self._seq = itertools.count()
+        self._routes: Dict[str, _RouteStats] = {}
+        self.stats: Dict[str, int] = {"retries": 0}
+        # Wird pro REST-Call im Kontext des Aufrufers aufgerufen (z.B. für Metriken pro Tool-Aufruf)
+        self.on_request: Optional[Callable[[str], None]] = None
+
+    def _bucket(self, route: str, major: Hashable) -> _Bucket:
+        key = (route, major)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= 1024:
+                self._prune()
+            rate, burst = ROUTE_LIMITS.get(route, DEFAULT_LIMIT)
+            bucket = self._buckets[key] = _Bucket(rate, burst, self._concurrency)
+        return bucket
+
+    def _prune(self) -> None:
+        """Entfernt Buckets ohne Arbeit, deren Limit vollständig aufgefüllt ist"""
+        for key, bucket in list(self._buckets.items()):
+            if bucket.worker is None and bucket.in_flight == 0 and bucket.queue.empty() and bucket.limiter.idle():
+                del self._buckets[key]
+
+    async def request(
+        self,
+        route: str,
+        major: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        priority: int = INTERACTIVE,
+    ) -> Any:
+        """Reiht einen REST-Call in den Bucket (route, major) ein und wartet auf das Ergebnis"""
+        if self.on_request is not None:
+            self.on_request(route)
+        future = asyncio.get_running_loop().create_future()
+        self._routes.setdefault(route, _RouteStats()).submitted += 1
+        self._enqueue(self._bucket(route, major), _Job(factory, future, route, priority))
+        return await future
+
+    def _enqueue(self, bucket: _Bucket, job: _Job) -> None:
+        bucket.queue.put_nowait((job.priority, next(self._seq), job))
+        if bucket.worker is None:
+            bucket.worker = asyncio.create_task(self._drain(bucket))
+
+    async def _drain(self, bucket: _Bucket) -> None:
+        try:
+            while not bucket.queue.empty():
+                # Erst auf Slot und Limit warten, dann den wichtigsten Job nehmen -
+                # so überholen inzwischen eingereihte INTERACTIVE-Jobs wartende BULK-Jobs
+                await bucket.slots.acquire()
+                await bucket.limiter.acquire()
+                _, _, job = bucket.queue.get_nowait()
+                if job.future.done():
+                    # Aufrufer hat aufgegeben
+                    bucket.slots.release()
+                    continue
+                reserve = 0.0 if job.priority == INTERACTIVE else self._bulk_reserve
+                await self._global.acquire(reserve)
+
+                waited = time.monotonic() - job.enqueued
+                stats = self._routes[job.route]
+                stats.wait_total += waited
+                stats.wait_max = max(stats.wait_max, waited)
+                bucket.in_flight += 1
+                asyncio.create_task(self._execute(bucket, job))
+        finally:
+            bucket.worker = None
+
+    async def _execute(self, bucket: _Bucket, job: _Job) -> None:
+        stats = self._routes[job.route]
+        try:
+            result = await job.factory()
+        except Exception as e:
+            retry_after = getattr(e, "retry_after", None)
+            if retry_after is None and getattr(e, "status", None) == 429:
+                retry_after = 1.0
+            if retry_after is not None:
+                stats.rate_limited += 1
+                bucket.limiter.block(retry_after)
+                if job.retries < self._max_retries and not job.future.done():
+                    logger.warning(f"Rate limited on {job.route}, retrying in {retry_after:.2f}s")
+                    job.retries += 1
+                    self.stats["retries"] += 1
+                    self._enqueue(bucket, job)
+                    return
+            stats.failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            stats.completed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            bucket.in_flight -= 1
+            bucket.slots.release()
+
+    async def paced(
+        self,
+        route: str,
+        major: Hashable,
+        iterator: AsyncIterator[Any],
+        page_size: int = 100,
+        priority: int = INTERACTIVE,
+    ) -> AsyncIterator[Any]:
+        """Taktet einen seitenweise ladenden Iterator (z.B. channel.history) pro Seite.
+
+        Eine Seite entspricht einem REST-Call und läuft als Job im Bucket der Route.
+        """
+        iterator = iterator.__aiter__()
+
+        async def next_page():
+            return [item async for item in _take(iterator, page_size)]
+
+        while True:
+            page = await self.request(route, major, next_page, priority)
+            for item in page:
+                yield item
+            if len(page) < page_size:
+                return
+
+    def report(self) -> Dict[str, Any]:
+        """Queue-Tiefe, laufende Calls und Wartezeiten pro Route"""
+        depth: Dict[str, int] = {}
+        in_flight: Dict[str, int] = {}
+        for (route, _), bucket in self._buckets.items():
+            depth[route] = depth.get(route, 0) + bucket.queue.qsize()
+            in_flight[route] = in_flight.get(route, 0) + bucket.in_flight
+        routes = {}
+        for route, stats in self._routes.items():
+            started = stats.completed + stats.failed + in_flight.get(route, 0)
+            routes[route] = {
+                "queued": depth.get(route, 0),
+                "in_flight": in_flight.get(route, 0),
+                "completed": stats.completed,
+                "failed": stats.failed,
+                "rate_limited": stats.rate_limited,
+                "avg_wait_ms": round(stats.wait_total / started * 1000, 1) if started else 0.0,
+                "max_wait_ms": round(stats.wait_max * 1000, 1),
+            }
+        return {
+            **self.stats,
+            "queue_depth": sum(depth.values()),
+            "buckets": len(self._buckets),
+            "routes": routes,
+        }
+
+
+async def _take(iterator: AsyncIterator[Any], count: int) -> AsyncIterator[Any]:
+    """Liefert höchstens count Elemente aus einem laufenden Iterator"""
+    for _ in range(count):
+        try:
+            yield await iterator.__anext__()
+        except StopAsyncIteration:
+            return
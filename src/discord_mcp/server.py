@@ -5,22 +5,49 @@ import json
 import signal
 import sys
 import atexit
-import threading
 import ctypes
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Union
+import re
+import heapq
+import hashlib
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
 from functools import wraps
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from dotenv import load_dotenv
 
+# Startzeitpunkt für die Kaltstart-Metrik (vor dem Import von discord.py)
+_PROCESS_START = time.perf_counter()
+
 import discord
 from discord.ext import commands
 from discord.ext.commands import Bot
-from .template_manager import TemplateManager  # Korrigierter Import
+from .template_manager import get_templates
+from .entity_cache import EntityResolver
+from .tool_catalog import ToolCatalog
+from .tool_registry import ToolRegistry
+from .codec import get_codec
+from .message_store import MessageStore
+from .rest_scheduler import BULK, INTERACTIVE, RestScheduler
+from .member_index import MemberIndex
+from .bot_roles import BotRoleCache
+from .subscriptions import EVENTS, POLICIES, SubscriptionHub
+from .metrics import Metrics
+from .welcome_store import WelcomedUsers
+
+try:
+    import anyio
+    _END_OF_STREAM = (anyio.EndOfStream,)
+except ImportError:
+    _END_OF_STREAM = ()
 
-# Globale Template-Instanz
-templates = TemplateManager()
+# Request-ID des Befehls, der im aktuellen Task verarbeitet wird
+_current_request_id: ContextVar = ContextVar("mcp_request_id", default=None)
+# Größe des eingelesenen Frames (Bytes) für die Payload-Metrik, ohne die Argumente neu zu serialisieren
+_current_frame_size: ContextVar = ContextVar("mcp_frame_size", default=0)
 
 # Lokale MCP-Klassen
 @dataclass
@@ -39,10 +66,26 @@ class EmptyResult:
     pass
 
 class Server:
-    def __init__(self, name: str):
+    def __init__(self, name: str, max_inflight: Optional[int] = None, codec: Any = None):
         self.name = name
+        # JSON-Codec (orjson/msgspec wenn installiert, sonst stdlib)
+        self.codec = codec or get_codec()
         self._tool_list_handler = None
         self._tool_call_handler = None
+        self._readonly_handler = None
+        # Obergrenze für gleichzeitig laufende Befehle
+        self.max_inflight = max_inflight or int(os.getenv("MCP_MAX_INFLIGHT", "16"))
+        self._inflight: set = set()
+        self._write_queue: Optional[asyncio.Queue] = None
+        # Begrenzte Schreib-Queue: Streaming-Handler warten, wenn der Client nicht mitliest
+        self.write_queue_size = int(os.getenv("MCP_WRITE_QUEUE_SIZE", "256"))
+        # Batches: Standard-Parallelität und maximale Anzahl Aufrufe pro Batch
+        self.batch_concurrency = int(os.getenv("MCP_BATCH_CONCURRENCY", "8"))
+        self.max_batch_size = int(os.getenv("MCP_MAX_BATCH_SIZE", "100"))
+        # Frist, in der laufende Befehle beim Beenden noch abgeschlossen werden
+        self.drain_timeout = float(os.getenv("MCP_DRAIN_TIMEOUT", "5"))
+        self._run_task: Optional[asyncio.Task] = None
+        self._closing = False
     
     def list_tools(self):
         def decorator(func):
@@ -55,119 +98,287 @@ class Server:
             self._tool_call_handler = func
             return func
         return decorator
+
+    def readonly_tool(self):
+        """Registriert ein Prädikat name -> bool für Tools ohne Seiteneffekte (Batch-Deduplizierung)"""
+        def decorator(func):
+            self._readonly_handler = func
+            return func
+        return decorator
         
     def create_initialization_options(self):
         return {"name": self.name}
-        
-    async def run(self, read_stream: Any, write_stream: Any, options: dict):
-        logger.info(f"Starting MCP server: {self.name}")
-        while True:
+
+    @property
+    def inflight(self) -> int:
+        """Anzahl der aktuell laufenden Befehle"""
+        return len(self._inflight)
+
+    async def _read(self, read_stream: Any) -> bytes:
+        """Liest den nächsten Frame - unterstützt beide Stream-Typen"""
+        try:
+            if hasattr(read_stream, 'receive'):
+                # MemoryObjectReceiveStream
+                return await read_stream.receive()
+            # Standard StreamReader
+            return await read_stream.readline()
+        except _END_OF_STREAM:
+            return b''
+
+    async def _writer(self, write_stream: Any):
+        """Einziger Schreiber auf dem Ausgabestream, damit sich Antworten nie vermischen"""
+        closing = False
+        while not closing:
+            chunks = await self._write_queue.get()
+            if chunks is None:
+                break
+            # Alle bereits wartenden Antworten als einen Burst schreiben
+            burst = [chunks]
+            while not self._write_queue.empty():
+                chunks = self._write_queue.get_nowait()
+                if chunks is None:
+                    closing = True
+                    break
+                burst.append(chunks)
+            try:
+                if hasattr(write_stream, 'send'):
+                    # MemoryObjectSendStream
+                    for chunks in burst:
+                        await write_stream.send(b''.join(chunks))
+                else:
+                    # StreamWriter / StreamAdapter - ein drain() pro Burst
+                    for chunks in burst:
+                        if hasattr(write_stream, 'writelines'):
+                            write_stream.writelines(chunks)
+                        else:
+                            write_stream.write(b''.join(chunks))
+                    await write_stream.drain()
+            except Exception:
+                logger.error("Failed to send response", exc_info=True)
+
+    async def _send(self, response: dict):
+        """Reiht eine Antwort in die Schreib-Queue ein"""
+        await self._write_queue.put((self.codec.encode_line(response),))
+
+    async def send_partial(self, result: List[Any]) -> bool:
+        """Sendet ein Teilergebnis für den laufenden Befehl vor dessen finaler Antwort"""
+        if self._write_queue is None:
+            return False
+        response = {"type": "partial", "result": result}
+        request_id = _current_request_id.get()
+        if request_id is not None:
+            response["id"] = request_id
+        await self._send(response)
+        return True
+
+    async def send_notification(self, notification: dict) -> bool:
+        """Sendet eine Notification ohne Request-ID (z.B. Gateway-Events eines Abonnements)"""
+        if self._write_queue is None or self._closing:
+            return False
+        await self._send({"type": "notification", **notification})
+        return True
+
+    async def _send_catalog(self, catalog: ToolCatalog, request_id: Any):
+        """Schreibt den vorserialisierten Tool-Katalog ohne erneutes Serialisieren"""
+        suffix = b'}\n' if request_id is None else b', "id": ' + self.codec.dumps(request_id) + b'}\n'
+        await self._write_queue.put((b'{"type": "tools", "tools": ', catalog.payload, suffix))
+
+    async def _handle(self, command: dict) -> Union[dict, ToolCatalog]:
+        """Führt einen einzelnen Befehl aus und baut die Antwort"""
+        if command.get("type") == "list_tools" and self._tool_list_handler:
+            tools = await self._tool_list_handler()
+            if isinstance(tools, ToolCatalog):
+                return tools
+            return {
+                "type": "tools",
+                "tools": list(tools)
+            }
+        if command.get("type") == "call_tool" and self._tool_call_handler:
+            tool_name = command.get("tool")
+            args = command.get("arguments", {})
+            result = await self._tool_call_handler(tool_name, args)
+            return {
+                "type": "result",
+                "result": list(result)
+            }
+        if command.get("type") == "batch" and self._tool_call_handler:
+            return {
+                "type": "batch",
+                "results": await self._handle_batch(command)
+            }
+        return {
+            "type": "error",
+            "error": "Invalid command or handler not set"
+        }
+
+    async def _call_entry(self, call: Any, slots: asyncio.Semaphore) -> dict:
+        """Führt einen Aufruf eines Batches aus; Fehler landen im Ergebnis statt im Batch"""
+        async with slots:
             try:
-                # Lese Daten - unterstützt beide Stream-Typen
+                if not isinstance(call, dict):
+                    raise ValueError("Batch entries must be objects with tool and arguments")
+                result = await self._tool_call_handler(call.get("tool"), call.get("arguments", {}))
+                return {"type": "result", "result": list(result)}
+            except Exception as e:
+                logger.error(f"Error in batch call {call!r:.200}: {e}")
+                return {"type": "error", "error": str(e)}
+
+    def _dedupe_key(self, call: Any) -> Optional[str]:
+        """Schlüssel für identische Aufrufe lesender Tools, sonst None"""
+        if not isinstance(call, dict) or self._readonly_handler is None:
+            return None
+        if not self._readonly_handler(call.get("tool")):
+            return None
+        return json.dumps([call.get("tool"), call.get("arguments", {})], sort_keys=True, default=str)
+
+    async def _handle_batch(self, command: dict) -> List[dict]:
+        """Führt mehrere Tool-Aufrufe aus: parallel, sequential oder stop_on_error.
+
+        Identische Aufrufe lesender Tools laufen nur einmal; gemeinsame Ziele (z.B. derselbe
+        Server) teilen sich über den Entity-Cache ohnehin einen Request.
+        """
+        calls = command.get("calls")
+        if not isinstance(calls, list):
+            raise ValueError("batch requires a list of calls")
+        if len(calls) > self.max_batch_size:
+            raise ValueError(f"Batch exceeds {self.max_batch_size} calls")
+        mode = command.get("mode", "parallel")
+        if mode not in ("parallel", "sequential", "stop_on_error"):
+            raise ValueError(f"Unknown batch mode: {mode}")
+        concurrency = int(command.get("concurrency", self.batch_concurrency)) if mode == "parallel" else 1
+        # Die Aufrufe eines Batches teilen sich einen Frame; jeder zählt anteilig
+        _current_frame_size.set(_current_frame_size.get() // max(1, len(calls)))
+        slots = asyncio.Semaphore(max(1, concurrency))
+
+        shared: Dict[str, asyncio.Future] = {}
+        if mode == "parallel":
+            pending = []
+            for call in calls:
+                key = self._dedupe_key(call)
+                if key is None or key not in shared:
+                    task = asyncio.ensure_future(self._call_entry(call, slots))
+                    if key is not None:
+                        shared[key] = task
+                else:
+                    task = shared[key]
+                pending.append(task)
+            return list(await asyncio.gather(*pending))
+
+        results: List[dict] = []
+        for call in calls:
+            key = self._dedupe_key(call)
+            if key is not None and key in shared:
+                result = shared[key]
+            else:
+                result = await self._call_entry(call, slots)
+                if key is not None:
+                    shared[key] = result
+            results.append(result)
+            if mode == "stop_on_error" and result["type"] == "error":
+                break
+        # Nach einem Fehler nicht mehr ausgeführte Aufrufe
+        results.extend({"type": "skipped"} for _ in range(len(calls) - len(results)))
+        return results
+
+    async def _dispatch(self, data: bytes, limiter: asyncio.Semaphore):
+        """Verarbeitet einen Befehl als eigener Task und sendet die Antwort sobald sie fertig ist"""
+        request_id = None
+        _current_frame_size.set(len(data))
+        try:
+            command = self.codec.loads(data)
+            if isinstance(command, dict):
+                request_id = command.get("id")
+                _current_request_id.set(request_id)
+            logger.debug(f"Received command: {command}")
+            response = await self._handle(command)
+        except self.codec.decode_errors as e:
+            logger.error(f"Invalid JSON received: {e}")
+            response = {"type": "error", "error": str(e)}
+        except asyncio.CancelledError:
+            # Beim Beenden nach Ablauf der Frist abgebrochen - dem Client trotzdem antworten
+            response = {"type": "error", "error": "Cancelled: server shutting down"}
+            if request_id is not None:
+                response["id"] = request_id
+            try:
+                self._write_queue.put_nowait((self.codec.encode_line(response),))
+            except asyncio.QueueFull:
+                pass
+            raise
+        except Exception as e:
+            logger.error(f"Error processing command: {e}", exc_info=True)
+            response = {"type": "error", "error": str(e)}
+        finally:
+            limiter.release()
+
+        if isinstance(response, ToolCatalog):
+            await self._send_catalog(response, request_id)
+            return
+
+        # Antwort mit der Request-ID des Aufrufers markieren
+        if request_id is not None:
+            response["id"] = request_id
+        await self._send(response)
+
+    async def shutdown(self) -> None:
+        """Beendet run(): keine neuen Befehle mehr, laufende bis drain_timeout abschließen, Ausgabe flushen"""
+        task = self._run_task
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _drain(self, writer_task: asyncio.Task) -> None:
+        """Wartet bis zur Frist auf laufende Befehle, bricht den Rest ab und leert die Schreib-Queue"""
+        self._closing = True
+        if self._inflight:
+            done, pending = await asyncio.wait(self._inflight, timeout=self.drain_timeout)
+            if pending:
+                logger.warning(f"Cancelling {len(pending)} commands still running after {self.drain_timeout}s")
+                for task in pending:
+                    task.cancel()
+                await asyncio.wait(pending)
+        await self._write_queue.put(None)
+        await writer_task
+
+    async def run(self, read_stream: Any, write_stream: Any, options: dict):
+        logger.info(f"Starting MCP server: {self.name} (max in-flight: {self.max_inflight})")
+        self._run_task = asyncio.current_task()
+        self._write_queue = asyncio.Queue(maxsize=self.write_queue_size)
+        writer_task = asyncio.create_task(self._writer(write_stream))
+        limiter = asyncio.Semaphore(self.max_inflight)
+        try:
+            while True:
                 try:
-                    if hasattr(read_stream, 'receive'):
-                        # MemoryObjectReceiveStream
-                        data = await read_stream.receive()
-                    else:
-                        # Standard StreamReader
-                        data = await read_stream.readline()
-                except anyio.EndOfStream:
+                    data = await self._read(read_stream)
+                except FrameError as e:
+                    logger.error(f"Dropping invalid frame: {e}")
+                    await self._send({"type": "error", "error": str(e)})
+                    continue
+                if not data:
                     logger.info("Input stream closed, shutting down MCP server")
                     break
+                if not data.strip():
+                    continue
 
-                if not data:
-                    logger.info("Input stream closed")
-                    # Weitere Verarbeitung folgt hier ...
-                    command = json.loads(data.decode('utf-8'))
-                    logger.debug(f"Received command: {command}")
-                    if command.get("type") == "list_tools" and self._tool_list_handler:
-                        tools = await self._tool_list_handler()
-                        response = {
-                            "type": "tools",
-                            "tools": [asdict(tool) for tool in tools]
-                        }
-                    elif command.get("type") == "call_tool" and self._tool_call_handler:
-                        tool_name = command.get("tool")
-                        args = command.get("arguments", {})
-                        result = await self._tool_call_handler(tool_name, args)
-                        response = {
-                            "type": "result",
-                            "result": [asdict(r) for r in result]
-                        }
-                    else:
-                        response = {
-                            "type": "error",
-                            "error": "Invalid command or handler not set"
-                        }
-                        
-                    # Sende Antwort - unterstützt beide Stream-Typen
-                    response_data = json.dumps(response).encode('utf-8') + b'\n'
-                    if hasattr(write_stream, 'send'):
-                        # MemoryObjectSendStream
-                        await write_stream.send(response_data)
-                    else:
-                        # Standard StreamWriter
-                        write_stream.write(response_data)
-                        await write_stream.drain()
-                else:
-                    # Verarbeite Daten
-                    command = json.loads(data.decode('utf-8'))
-                    logger.debug(f"Received command: {command}")
-                    if command.get("type") == "list_tools" and self._tool_list_handler:
-                        tools = await self._tool_list_handler()
-                        response = {
-                            "type": "tools",
-                            "tools": [asdict(tool) for tool in tools]
-                        }
-                    elif command.get("type") == "call_tool" and self._tool_call_handler:
-                        tool_name = command.get("tool")
-                        args = command.get("arguments", {})
-                        result = await self._tool_call_handler(tool_name, args)
-                        response = {
-                            "type": "result",
-                            "result": [asdict(r) for r in result]
-                        }
-                    else:
-                        response = {
-                            "type": "error",
-                            "error": "Invalid command or handler not set"
-                        }
-                        
-                    # Sende Antwort - unterstützt beide Stream-Typen
-                    response_data = json.dumps(response).encode('utf-8') + b'\n'
-                    if hasattr(write_stream, 'send'):
-                        # MemoryObjectSendStream
-                        await write_stream.send(response_data)
-                    else:
-                        # Standard StreamWriter
-                        write_stream.write(response_data)
-                        await write_stream.drain()
-                        
-            except json.JSONDecodeError as e:
-                logger.error(f"Invalid JSON received: {e}")
-                error_data = json.dumps({"type": "error", "error": str(e)}).encode('utf-8') + b'\n'
-                try:
-                    if hasattr(write_stream, 'send'):
-                        await write_stream.send(error_data)
-                    else:
-                        write_stream.write(error_data)
-                        await write_stream.drain()
-                except Exception as e2:
-                    logger.error("Failed to send error response", exc_info=True)
-            except Exception as e:
-                logger.error(f"Error processing command: {e}", exc_info=True)
-                error_data = json.dumps({"type": "error", "error": str(e)}).encode('utf-8') + b'\n'
-                try:
-                    if hasattr(write_stream, 'send'):
-                        await write_stream.send(error_data)
-                    else:
-                        write_stream.write(error_data)
-                        await write_stream.drain()
-                except Exception as e2:
-                    logger.error("Failed to send error response", exc_info=True)
+                # Jeder Befehl läuft als eigener Task, begrenzt durch max_inflight
+                await limiter.acquire()
+                task = asyncio.create_task(self._dispatch(data, limiter))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+        finally:
+            # Laufende Befehle abschließen, dann den Schreiber beenden - auch wenn run() abgebrochen wurde
+            drain = asyncio.ensure_future(self._drain(writer_task))
+            try:
+                await asyncio.shield(drain)
+            except asyncio.CancelledError:
+                await drain
+                raise
 
 # Entferne die duplizierte stdio_server Funktion (sie ist bereits im mcp.server.stdio Modul)
-from mcp.server.stdio import stdio_server
+from mcp.server.stdio import FrameError, stdio_server
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("discord-mcp-server")
@@ -193,7 +404,63 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 intents.dm_messages = True  # DM-Nachrichten aktivieren
-bot: Bot = commands.Bot(command_prefix="/", intents=intents, help_command=None)
+
+def _member_cache_flags(policy: str) -> discord.MemberCacheFlags:
+    """MemberCacheFlags aus DISCORD_MEMBER_CACHE: "default", "none" oder Flags wie "voice,joined" """
+    policy = policy.strip().lower()
+    if policy == "default":
+        return discord.MemberCacheFlags.from_intents(intents)
+    flags = discord.MemberCacheFlags.none()
+    if policy != "none":
+        for name in policy.split(","):
+            name = name.strip()
+            if name not in discord.MemberCacheFlags.VALID_FLAGS:
+                raise ValueError(f"Unknown member cache flag: {name}")
+            setattr(flags, name, True)
+    return flags
+
+# Speicherverbrauch: Chunking beim Start, Member-Cache und Nachrichten-Cache konfigurierbar
+CHUNK_GUILDS_AT_STARTUP = os.getenv("DISCORD_CHUNK_GUILDS_AT_STARTUP", "true").lower() in ("1", "true", "yes")
+_max_messages = os.getenv("DISCORD_MAX_MESSAGES", "1000")
+MAX_MESSAGES = int(_max_messages) if _max_messages.isdigit() and int(_max_messages) > 0 else None
+
+def _shard_options(shard_count: str, shard_ids: str) -> Optional[Dict[str, Any]]:
+    """Optionen für AutoShardedBot aus DISCORD_SHARD_COUNT/DISCORD_SHARD_IDS; None = ohne Sharding"""
+    shard_count = shard_count.strip().lower()
+    if not shard_count:
+        if shard_ids.strip():
+            raise ValueError("DISCORD_SHARD_IDS requires DISCORD_SHARD_COUNT")
+        return None
+    if shard_count == "auto":
+        if shard_ids.strip():
+            raise ValueError("DISCORD_SHARD_IDS requires a numeric DISCORD_SHARD_COUNT")
+        # Anzahl der Shards empfiehlt Discord beim Login
+        return {}
+    options: Dict[str, Any] = {"shard_count": int(shard_count)}
+    if shard_ids.strip():
+        ids = [int(shard_id) for shard_id in shard_ids.split(",")]
+        if any(not 0 <= shard_id < options["shard_count"] for shard_id in ids):
+            raise ValueError(f"DISCORD_SHARD_IDS must be between 0 and {options['shard_count'] - 1}")
+        options["shard_ids"] = ids
+    return options
+
+# Große Bots: mehrere Gateway-Verbindungen (Shards) in einem Prozess
+SHARD_OPTIONS = _shard_options(os.getenv("DISCORD_SHARD_COUNT", ""), os.getenv("DISCORD_SHARD_IDS", ""))
+bot: Bot = (commands.AutoShardedBot if SHARD_OPTIONS is not None else commands.Bot)(
+    command_prefix="/",
+    intents=intents,
+    help_command=None,
+    chunk_guilds_at_startup=CHUNK_GUILDS_AT_STARTUP,
+    member_cache_flags=_member_cache_flags(os.getenv("DISCORD_MEMBER_CACHE", "default")),
+    max_messages=MAX_MESSAGES,
+    **(SHARD_OPTIONS or {}),
+)
+
+def _shard_latencies() -> List[Tuple[int, float]]:
+    """(Shard-ID, Heartbeat-Latenz) für jede Gateway-Verbindung, auch ohne Sharding"""
+    if isinstance(bot, commands.AutoShardedBot):
+        return bot.latencies
+    return [(bot.shard_id or 0, bot.latency)]
 
 # Initialize MCP server
 app = Server("discord-server")
@@ -201,8 +468,75 @@ app = Server("discord-server")
 # Store Discord client reference
 discord_client = None
 
-# Füge Dictionary für Benutzer-Status hinzu
-welcomed_users = set()
+# Wird von on_ready gesetzt; Tool-Aufrufe warten darauf, statt sofort fehlzuschlagen
+bot_ready = asyncio.Event()
+READY_TIMEOUT = float(os.getenv("DISCORD_READY_TIMEOUT", "30"))
+# Hash des zuletzt synchronisierten Command-Trees (pro Application-ID)
+COMMAND_TREE_HASH_PATH = os.getenv("COMMAND_TREE_HASH_PATH", ".command_tree_hash")
+_synced_tree_digest: Optional[str] = None
+# Dauer von Start-Phasen in Sekunden
+STARTUP_METRICS: Dict[str, float] = {}
+
+# Alle REST-Calls der Tools laufen über Route-Buckets mit Priorität (interaktiv vor Bulk)
+rest = RestScheduler(
+    global_rate=float(os.getenv("REST_GLOBAL_RATE", "50")),
+    concurrency=int(os.getenv("REST_BUCKET_CONCURRENCY", "4")),
+)
+
+# Latenz, Ergebnisse, Payload-Größen und REST-Calls pro Tool; optional per HTTP unter /metrics
+metrics = Metrics()
+rest.on_request = metrics.count_rest_call
+METRICS_PORT = int(os.getenv("METRICS_PORT") or 0)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+metrics.gauge("mcp_commands_inflight", "MCP commands currently running", lambda: app.inflight)
+metrics.gauge("rest_queue_depth", "REST calls waiting in the scheduler", lambda: rest.report()["queue_depth"])
+metrics.gauge(
+    "gateway_latency_seconds",
+    "Discord gateway heartbeat latency per shard",
+    lambda: {("shard", shard_id): latency for shard_id, latency in _shard_latencies()},
+)
+metrics.gauge("startup_seconds", "Duration of startup phases", lambda: {("phase", k): v for k, v in STARTUP_METRICS.items()})
+
+# Gateway-Cache -> TTL/LRU-Cache -> REST für Channels, Guilds, User, Member und Nachrichten
+resolver = EntityResolver(
+    bot,
+    ttl=float(os.getenv("ENTITY_CACHE_TTL", "300")),
+    maxsize=int(os.getenv("ENTITY_CACHE_SIZE", "1024")),
+    scheduler=rest,
+)
+
+# User -> Server und Rolle -> Mitglieder, gepflegt über Gateway-Events
+member_index = MemberIndex()
+# Eigene Rollen des Bots pro Server für die Erkennung von Rollen-Erwähnungen
+bot_roles = BotRoleCache()
+
+# Abonnements für Gateway-Events, zugestellt als Notifications über den MCP-Transport
+subscriptions = SubscriptionHub(
+    app.send_notification,
+    max_subscriptions=int(os.getenv("MCP_MAX_SUBSCRIPTIONS", "32")),
+)
+
+# Optionaler lokaler Nachrichtenspeicher für read_messages (SQLite)
+MESSAGE_STORE_PATH = os.getenv("MESSAGE_STORE_PATH")
+# Maximale Lücke, die nach einem Disconnect nachgeladen wird, bevor neu synchronisiert wird
+MESSAGE_STORE_MAX_GAP = int(os.getenv("MESSAGE_STORE_MAX_GAP", "1000"))
+message_store: Optional[MessageStore] = MessageStore(MESSAGE_STORE_PATH) if MESSAGE_STORE_PATH else None
+# Aufbewahrung: ältere bzw. überzählige Nachrichten werden regelmäßig gelöscht (0 = unbegrenzt)
+MESSAGE_STORE_MAX_AGE_DAYS = float(os.getenv("MESSAGE_STORE_MAX_AGE_DAYS") or 90)
+MESSAGE_STORE_MAX_ROWS = int(os.getenv("MESSAGE_STORE_MAX_ROWS") or 1000000)
+# Sekunden zwischen zwei gebündelten Schreibvorgängen aus Gateway-Events
+MESSAGE_STORE_FLUSH_INTERVAL = float(os.getenv("MESSAGE_STORE_FLUSH_INTERVAL") or 1)
+# Ein Sync pro Channel gleichzeitig
+_channel_sync_locks: Dict[int, asyncio.Lock] = {}
+# Ein Chunk-Request pro Server gleichzeitig
+_guild_chunk_locks: Dict[int, asyncio.Lock] = {}
+
+# Bereits begrüßte User, bleibt über Neustarts erhalten (leerer Pfad = nur im Speicher)
+WELCOME_STORE_PATH = os.getenv("WELCOME_STORE_PATH", "")
+welcomed_users = WelcomedUsers(
+    WELCOME_STORE_PATH or None,
+    max_users=int(os.getenv("WELCOME_STORE_MAX_USERS", "1000000")),
+)
 
 HELP_TEXT = """
 **Verfügbare Befehle:**
@@ -229,8 +563,7 @@ async def roles(interaction: discord.Interaction):
     """Zeigt die Rollen des Benutzers"""
     if isinstance(interaction.channel, discord.DMChannel):
         user_roles = []
-        for guild in bot.guilds:
-            member = guild.get_member(interaction.user.id)
+        for guild, member in _mutual_members(interaction.user.id):
             if member:
                 roles = [role.name for role in member.roles if role.name != "@everyone"]
                 if roles:
@@ -248,28 +581,85 @@ Bot Status:
 - Name: {bot.user.name}
 - ID: {bot.user.id}
 - Server: {len(bot.guilds)}
-- Ping: {round(bot.latency * 1000)}ms
+- Ping: {_format_latency(bot.latency)}
 - Uptime: {datetime.now() - bot.start_time}
 """
+        if isinstance(bot, commands.AutoShardedBot):
+            # Latenz pro Shard; bot.latency ist hier nur der Durchschnitt
+            status += f"- Shards: {bot.shard_count}\n" + "".join(
+                f"  - Shard {shard_id}: {_format_latency(latency)}\n" for shard_id, latency in _shard_latencies()
+            )
         await interaction.response.send_message(status, ephemeral=True)
 
+def _format_latency(latency: float) -> str:
+    """Latenz in ms; vor dem ersten Heartbeat ist sie inf oder nan"""
+    return f"{round(latency * 1000)}ms" if math.isfinite(latency) else "verbindet..."
+
 @bot.tree.command(name="help", description="Zeigt diese Hilfe")
 async def help(interaction: discord.Interaction):
     """Zeigt die Hilfe"""
-    help_text = templates.get("help")
+    help_text = get_templates().get("help")
     await interaction.response.send_message(help_text, ephemeral=True)
 
 @bot.event
 async def on_ready():
     global discord_client
     discord_client = bot
-    bot.start_time = datetime.now()
-    
-    # Synchronisiere Slash-Commands
-    await bot.tree.sync()
-    
+    if not bot_ready.is_set():
+        bot.start_time = datetime.now()
+        STARTUP_METRICS["cold_start_seconds"] = time.perf_counter() - _PROCESS_START
+        logger.info(f"Cold start: ready after {STARTUP_METRICS['cold_start_seconds']:.2f}s")
+    bot_ready.set()
     logger.info(f"Logged in as {bot.user.name}")
 
+    # Synchronisiere Slash-Commands (nur wenn sich der Command-Tree geändert hat)
+    try:
+        await _sync_command_tree()
+    except Exception as e:
+        logger.error(f"Command tree sync failed: {e}", exc_info=True)
+
+@bot.listen("on_shard_ready")
+async def _record_shard_ready(shard_id: int):
+    if f"shard_{shard_id}_ready_seconds" not in STARTUP_METRICS:
+        STARTUP_METRICS[f"shard_{shard_id}_ready_seconds"] = time.perf_counter() - _PROCESS_START
+        logger.info(f"Shard {shard_id} ready after {STARTUP_METRICS[f'shard_{shard_id}_ready_seconds']:.2f}s")
+
+def _command_tree_digest() -> str:
+    """Hash über die Definitionen aller Slash-Commands, wie sie an Discord gesendet werden"""
+    payload = sorted((command.to_dict(bot.tree) for command in bot.tree.get_commands()), key=lambda c: c["name"])
+    tree_hash = hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+    return f"{bot.application_id}:{tree_hash}"
+
+async def _sync_command_tree() -> None:
+    """Synchronisiert die Slash-Commands nur, wenn der Hash vom zuletzt gespeicherten abweicht"""
+    global _synced_tree_digest
+    digest = _command_tree_digest()
+    if _synced_tree_digest is None:
+        try:
+            with open(COMMAND_TREE_HASH_PATH, encoding='utf-8') as f:
+                _synced_tree_digest = f.read().strip()
+        except OSError:
+            _synced_tree_digest = ""
+    if digest == _synced_tree_digest:
+        logger.info("Command tree unchanged, skipping sync")
+        return
+
+    started = time.perf_counter()
+    await bot.tree.sync()
+    STARTUP_METRICS["command_sync_seconds"] = time.perf_counter() - started
+    logger.info(f"Command tree synced in {STARTUP_METRICS['command_sync_seconds']:.2f}s")
+    _synced_tree_digest = digest
+    try:
+        directory = os.path.dirname(COMMAND_TREE_HASH_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = COMMAND_TREE_HASH_PATH + ".tmp"
+        with open(tmp_path, "w", encoding='utf-8') as f:
+            f.write(digest)
+        os.replace(tmp_path, COMMAND_TREE_HASH_PATH)
+    except OSError as e:
+        logger.warning(f"Could not persist command tree hash: {e}")
+
 @bot.event
 async def on_message(message):
     """Handle incoming messages"""
@@ -281,7 +671,7 @@ async def on_message(message):
         if isinstance(message.channel, discord.DMChannel):
             # Prüfe ob der Benutzer bereits begrüßt wurde
             if message.author.id not in welcomed_users:
-                welcome_msg = templates.get("welcome",
+                welcome_msg = get_templates().get("welcome",
                     user=message.author.mention,
                     bot_name=BOT_NAME,
                     orga_name=ORGA_NAME,
@@ -295,19 +685,22 @@ async def on_message(message):
         else:
             # Check for direct bot mention
             if bot.user in message.mentions:
-                response = templates.get("bot_mention", user=message.author.mention)
+                response = get_templates().get("bot_mention", user=message.author.mention)
                 await message.channel.send(response)
                 return
 
-            # Check for role mentions
-            mentioned_roles = set(role.id for role in message.role_mentions)
-            bot_roles = set(role.id for role in message.guild.get_member(bot.user.id).roles)
-            
-            if mentioned_roles & bot_roles:
-                # Finde die erste gemeinsame Rolle für die Erwähnung
-                role_id = (mentioned_roles & bot_roles).pop()
-                role = discord.utils.get(message.guild.roles, id=role_id)
-                response = templates.get("role_mention",
+            # Check for role mentions (role_mentions kommt fertig aus dem Gateway-Payload)
+            role_id = None
+            if message.role_mentions:
+                guild = message.guild
+                if guild.id not in bot_roles:
+                    _cache_bot_roles(guild)
+                role_id = bot_roles.first_match(guild.id, [role.id for role in message.role_mentions])
+
+            if role_id is not None:
+                # Erste erwähnte Rolle, die der Bot hat
+                role = message.guild.get_role(role_id)
+                response = get_templates().get("role_mention",
                     user=message.author.mention,
                     role=role.mention if role else "unbekannt"
                 )
@@ -315,7 +708,7 @@ async def on_message(message):
                 return
             
     except Exception as e:
-        error_msg = templates.get("error", error=str(e))
+        error_msg = get_templates().get("error", error=str(e))
         logger.error(f"Error handling message: {e}", exc_info=True)
         await message.channel.send(error_msg)
 
@@ -324,580 +717,2116 @@ async def on_message(message):
 # Continue processing commands
     await bot.process_commands(message)
 
+# Cache-Invalidierung durch Gateway-Events
+@bot.listen("on_guild_channel_update")
+async def _invalidate_updated_channel(before, after):
+    resolver.invalidate_channel(after.id)
+
+@bot.listen("on_guild_channel_delete")
+async def _invalidate_deleted_channel(channel):
+    resolver.invalidate_channel(channel.id)
+
+@bot.listen("on_raw_thread_update")
+async def _invalidate_updated_thread(payload):
+    resolver.invalidate_channel(payload.thread_id)
+
+@bot.listen("on_raw_thread_delete")
+async def _invalidate_deleted_thread(payload):
+    resolver.invalidate_channel(payload.thread_id)
+
+@bot.listen("on_guild_update")
+async def _invalidate_updated_guild(before, after):
+    resolver.invalidate_guild(after.id)
+
+@bot.listen("on_guild_remove")
+async def _invalidate_removed_guild(guild):
+    resolver.invalidate_guild(guild.id)
+
+@bot.listen("on_user_update")
+async def _invalidate_updated_user(before, after):
+    resolver.invalidate_user(after.id)
+
+@bot.listen("on_member_update")
+async def _invalidate_updated_member(before, after):
+    resolver.invalidate_member(after.guild.id, after.id)
+
+@bot.listen("on_raw_member_remove")
+async def _invalidate_removed_member(payload):
+    resolver.invalidate_member(payload.guild_id, payload.user.id)
+
+@bot.listen("on_raw_message_edit")
+async def _invalidate_edited_message(payload):
+    resolver.invalidate_message(payload.channel_id, payload.message_id)
+
+@bot.listen("on_raw_message_delete")
+async def _invalidate_deleted_message(payload):
+    resolver.invalidate_message(payload.channel_id, payload.message_id)
+
+@bot.listen("on_raw_bulk_message_delete")
+async def _invalidate_bulk_deleted_messages(payload):
+    for message_id in payload.message_ids:
+        resolver.invalidate_message(payload.channel_id, message_id)
+
+@bot.listen("on_raw_reaction_add")
+@bot.listen("on_raw_reaction_remove")
+@bot.listen("on_raw_reaction_clear")
+@bot.listen("on_raw_reaction_clear_emoji")
+async def _invalidate_reacted_message(payload):
+    # Per REST geholte Nachrichten erhalten keine Reaktions-Updates vom Gateway
+    resolver.invalidate_message(payload.channel_id, payload.message_id)
+
+# Mitglieder-Index aktuell halten
+def _member_role_ids(member) -> List[int]:
+    """Rollen-IDs eines Mitglieds ohne @everyone"""
+    return [role.id for role in member.roles[1:]]
+
+def _index_guild(guild) -> None:
+    member_index.add_guild(guild.id, ((member.id, _member_role_ids(member)) for member in guild.members))
+
+def _mutual_members(user_id: int):
+    """(Guild, Member) für alle gemeinsamen Server laut Index"""
+    for guild_id in member_index.guilds_of(user_id):
+        guild = bot.get_guild(guild_id)
+        if guild is not None:
+            yield guild, guild.get_member(user_id)
+
+async def _ensure_chunked(guild) -> bool:
+    """Lädt beim ersten Bedarf alle Mitglieder eines Servers in den Cache; True wenn gechunkt"""
+    if guild.chunked:
+        return True
+    # Nur Gateway-Server lassen sich chunken, und nur wenn der Member-Cache sie auch behält
+    if not bot.intents.members or not bot._connection.member_cache_flags.joined or bot.get_guild(guild.id) is None:
+        return False
+    lock = _guild_chunk_locks.setdefault(guild.id, asyncio.Lock())
+    async with lock:
+        if not guild.chunked:
+            started = time.perf_counter()
+            await guild.chunk()
+            _index_guild(guild)
+            logger.info(f"Chunked guild {guild.id} ({guild.member_count} members) in {time.perf_counter() - started:.2f}s")
+    return guild.chunked
+
+@bot.listen("on_ready")
+async def _index_all_guilds():
+    for guild in bot.guilds:
+        _index_guild(guild)
+
+@bot.listen("on_guild_join")
+@bot.listen("on_guild_available")
+async def _index_joined_guild(guild):
+    _index_guild(guild)
+
+@bot.listen("on_guild_remove")
+async def _unindex_removed_guild(guild):
+    member_index.remove_guild(guild.id)
+
+@bot.listen("on_member_join")
+async def _index_joined_member(member):
+    member_index.add_member(member.guild.id, member.id, _member_role_ids(member))
+
+@bot.listen("on_member_update")
+async def _index_updated_member(before, after):
+    # Ohne Chunking kann ein Mitglied auch ohne Event in den Cache gekommen sein (Update eines
+    # unbekannten Mitglieds); spätestens beim nächsten Update wird es nachgetragen
+    if before.roles != after.roles or not member_index.has_member(after.guild.id, after.id):
+        member_index.add_member(after.guild.id, after.id, _member_role_ids(after))
+
+@bot.listen("on_voice_state_update")
+async def _index_voice_member(member, before, after):
+    # Voice-Events nehmen Mitglieder in den Cache auf
+    if after.channel is not None and not member_index.has_member(member.guild.id, member.id):
+        member_index.add_member(member.guild.id, member.id, _member_role_ids(member))
+
+@bot.listen("on_raw_member_remove")
+async def _unindex_removed_member(payload):
+    member_index.remove_member(payload.guild_id, payload.user.id)
+
+@bot.listen("on_guild_role_delete")
+async def _unindex_deleted_role(role):
+    member_index.remove_role(role.id)
+
+# Rollen des Bots aktuell halten
+def _cache_bot_roles(guild) -> None:
+    me = guild.me
+    if me is not None:
+        bot_roles.set(guild.id, _member_role_ids(me))
+
+@bot.listen("on_ready")
+async def _cache_all_bot_roles():
+    for guild in bot.guilds:
+        _cache_bot_roles(guild)
+
+@bot.listen("on_guild_join")
+async def _cache_joined_guild_bot_roles(guild):
+    _cache_bot_roles(guild)
+
+@bot.listen("on_guild_remove")
+async def _drop_removed_guild_bot_roles(guild):
+    bot_roles.drop(guild.id)
+
+@bot.listen("on_member_update")
+async def _cache_updated_bot_roles(before, after):
+    if after.id == bot.user.id:
+        _cache_bot_roles(after.guild)
+
+@bot.listen("on_guild_role_create")
+async def _cache_created_bot_role(role):
+    # Integrationsrolle des Bots wird angelegt, bevor das Member-Update eintrifft
+    _cache_bot_roles(role.guild)
+
+@bot.listen("on_guild_role_update")
+async def _cache_updated_bot_role(before, after):
+    _cache_bot_roles(after.guild)
+
+@bot.listen("on_guild_role_delete")
+async def _uncache_deleted_bot_role(role):
+    bot_roles.remove_role(role.guild.id, role.id)
+
+# Gateway-Events an Abonnements verteilen
+def _id(value: Optional[int]) -> Optional[str]:
+    """Snowflakes als String, da sie nicht in einen JSON-Double passen"""
+    return str(value) if value is not None else None
+
+@bot.listen("on_message")
+async def _publish_message(message):
+    if not subscriptions.wants("message") or message.author.id == bot.user.id:
+        return
+    guild_id = message.guild.id if message.guild else None
+    subscriptions.publish("message", {
+        "id": _id(message.id),
+        "channel_id": _id(message.channel.id),
+        "guild_id": _id(guild_id),
+        "author_id": _id(message.author.id),
+        "author": str(message.author),
+        "content": message.content,
+        "created_at": message.created_at.isoformat(),
+    }, guild_id, message.channel.id, message.author.id)
+
+@bot.listen("on_raw_message_edit")
+async def _publish_message_edit(payload):
+    if not subscriptions.wants("message_edit"):
+        return
+    author_id = payload.data.get("author", {}).get("id")
+    author_id = int(author_id) if author_id is not None else None
+    if author_id == bot.user.id:
+        return
+    subscriptions.publish("message_edit", {
+        "id": _id(payload.message_id),
+        "channel_id": _id(payload.channel_id),
+        "guild_id": _id(payload.guild_id),
+        "author_id": _id(author_id),
+        "content": payload.data.get("content"),
+    }, payload.guild_id, payload.channel_id, author_id, key=payload.message_id)
+
+@bot.listen("on_raw_message_delete")
+async def _publish_message_delete(payload):
+    if subscriptions.wants("message_delete"):
+        _publish_deleted(payload.guild_id, payload.channel_id, payload.message_id, payload.cached_message)
+
+@bot.listen("on_raw_bulk_message_delete")
+async def _publish_bulk_message_delete(payload):
+    if subscriptions.wants("message_delete"):
+        cached = {message.id: message for message in payload.cached_messages}
+        for message_id in payload.message_ids:
+            _publish_deleted(payload.guild_id, payload.channel_id, message_id, cached.get(message_id))
+
+def _publish_deleted(guild_id: Optional[int], channel_id: int, message_id: int, cached_message) -> None:
+    # Autor ist nur bekannt, wenn die Nachricht im Cache lag
+    author_id = cached_message.author.id if cached_message is not None else None
+    subscriptions.publish("message_delete", {
+        "id": _id(message_id),
+        "channel_id": _id(channel_id),
+        "guild_id": _id(guild_id),
+        "author_id": _id(author_id),
+    }, guild_id, channel_id, author_id)
+
+@bot.listen("on_raw_reaction_add")
+async def _publish_reaction_add(payload):
+    _publish_reaction("reaction_add", payload)
+
+@bot.listen("on_raw_reaction_remove")
+async def _publish_reaction_remove(payload):
+    _publish_reaction("reaction_remove", payload)
+
+def _publish_reaction(event_type: str, payload) -> None:
+    if not subscriptions.wants(event_type) or payload.user_id == bot.user.id:
+        return
+    emoji = _emoji_name(payload.emoji)
+    subscriptions.publish(event_type, {
+        "message_id": _id(payload.message_id),
+        "channel_id": _id(payload.channel_id),
+        "guild_id": _id(payload.guild_id),
+        "user_id": _id(payload.user_id),
+        "emoji": emoji,
+    }, payload.guild_id, payload.channel_id, payload.user_id,
+        key=(payload.message_id, emoji, payload.user_id))
+
+@bot.listen("on_member_join")
+async def _publish_member_join(member):
+    if subscriptions.wants("member_join"):
+        subscriptions.publish("member_join", {
+            "guild_id": _id(member.guild.id),
+            "user_id": _id(member.id),
+            "name": str(member),
+            "bot": member.bot,
+        }, member.guild.id, None, member.id)
+
+@bot.listen("on_raw_member_remove")
+async def _publish_member_remove(payload):
+    if subscriptions.wants("member_remove"):
+        subscriptions.publish("member_remove", {
+            "guild_id": _id(payload.guild_id),
+            "user_id": _id(payload.user.id),
+            "name": str(payload.user),
+        }, payload.guild_id, None, payload.user.id)
+
+# Nachrichtenspeicher aktuell halten
+if message_store is not None:
+    @bot.listen("on_message")
+    async def _store_new_message(message):
+        message_store.on_gateway_message(message, _message_reactions(message))
+
+    @bot.listen("on_raw_message_edit")
+    async def _store_edited_message(payload):
+        content = payload.data.get("content")
+        if content is not None:
+            message_store.enqueue(message_store.update_content, payload.channel_id, payload.message_id, content)
+
+    @bot.listen("on_raw_message_delete")
+    async def _store_deleted_message(payload):
+        message_store.enqueue(message_store.delete, payload.channel_id, [payload.message_id])
+
+    @bot.listen("on_raw_bulk_message_delete")
+    async def _store_bulk_deleted_messages(payload):
+        message_store.enqueue(message_store.delete, payload.channel_id, list(payload.message_ids))
+
+    @bot.listen("on_raw_reaction_add")
+    async def _store_added_reaction(payload):
+        message_store.enqueue(message_store.adjust_reaction, payload.channel_id, payload.message_id, _emoji_name(payload.emoji), 1)
+
+    @bot.listen("on_raw_reaction_remove")
+    async def _store_removed_reaction(payload):
+        message_store.enqueue(message_store.adjust_reaction, payload.channel_id, payload.message_id, _emoji_name(payload.emoji), -1)
+
+    @bot.listen("on_guild_channel_delete")
+    async def _store_deleted_channel(channel):
+        message_store.drop_channel(channel.id)
+
+    @bot.listen("on_disconnect")
+    async def _store_disconnected():
+        # Während der Trennung können Nachrichten verpasst werden
+        message_store.mark_all_stale()
+
 # Helper function to ensure Discord client is ready
 def require_discord_client(func):
     @wraps(func)
     async def wrapper(*args, **kwargs):
-        if not discord_client:
-            raise RuntimeError("Discord client not ready")
+        # Aufrufe vor dem ersten on_ready warten, bis der Bot verbunden ist
+        if not bot_ready.is_set():
+            try:
+                await asyncio.wait_for(bot_ready.wait(), READY_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise RuntimeError("Discord client not ready") from None
         return await func(*args, **kwargs)
     return wrapper
 
-@app.list_tools()
-async def list_tools() -> List[Tool]:
-    """List available Discord tools."""
-    tools = [
-        # Server Information Tools
-        Tool(
-            name="get_server_info",
-            description="Get information about a Discord server",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "server_id": {
-                        "type": "string",
-                        "description": "Discord server (guild) ID"
-                    }
-                },
-                "required": ["server_id"]
-            }
-        ),
-        Tool(
-            name="list_members",
-            description="Get a list of members in a server",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "server_id": {
-                        "type": "string",
-                        "description": "Discord server (guild) ID"
-                    },
-                    "limit": {
-                        "type": "number",
-                        "description": "Maximum number of members to fetch",
-                        "minimum": 1,
-                        "maximum": 1000
-                    }
-                },
-                "required": ["server_id"]
-            }
-        ),
-
-        # Role Management Tools
-        Tool(
-            name="add_role",
-            description="Add a role to a user",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "server_id": {
-                        "type": "string",
-                        "description": "Discord server ID"
-                    },
-                    "user_id": {
-                        "type": "string",
-                        "description": "User to add role to"
-                    },
-                    "role_id": {
-                        "type": "string",
-                        "description": "Role ID to add"
-                    }
-                },
-                "required": ["server_id", "user_id", "role_id"]
-            }
-        ),
-        Tool(
-            name="remove_role",
-            description="Remove a role from a user",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "server_id": {
-                        "type": "string",
-                        "description": "Discord server ID"
-                    },
-                    "user_id": {
-                        "type": "string",
-                        "description": "User to remove role from"
-                    },
-                    "role_id": {
-                        "type": "string",
-                        "description": "Role ID to remove"
-                    }
-                },
-                "required": ["server_id", "user_id", "role_id"]
-            }
-        ),
-
-        # Channel Management Tools
-        Tool(
-            name="create_text_channel",
-            description="Create a new text channel",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "server_id": {
-                        "type": "string",
-                        "description": "Discord server ID"
-                    },
-                    "name": {
-                        "type": "string",
-                        "description": "Channel name"
-                    },
-                    "category_id": {
-                        "type": "string",
-                        "description": "Optional category ID to place channel in"
-                    },
-                    "topic": {
-                        "type": "string",
-                        "description": "Optional channel topic"
-                    }
-                },
-                "required": ["server_id", "name"]
-            }
-        ),
-        Tool(
-            name="delete_channel",
-            description="Delete a channel",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "channel_id": {
-                        "type": "string",
-                        "description": "ID of channel to delete"
-                    },
-                    "reason": {
-                        "type": "string",
-                        "description": "Reason for deletion"
-                    }
-                },
-                "required": ["channel_id"]
-            }
-        ),
-
-        # Message Reaction Tools
-        Tool(
-            name="add_reaction",
-            description="Add a reaction to a message",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "channel_id": {
-                        "type": "string",
-                        "description": "Channel containing the message"
-                    },
-                    "message_id": {
-                        "type": "string",
-                        "description": "Message to react to"
-                    },
-                    "emoji": {
-                        "type": "string",
-                        "description": "Emoji to react with (Unicode or custom emoji ID)"
-                    }
-                },
-                "required": ["channel_id", "message_id", "emoji"]
-            }
-        ),
-        Tool(
-            name="add_multiple_reactions",
-            description="Add multiple reactions to a message",
-            inputSchema={{
-                "type": "object",
-                "properties": {
-                    "channel_id": {
-                        "type": "string",
-                        "description": "Channel containing the message"
-                    },
-                    "message_id": {
-                        "type": "string",
-                        "description": "Message to react to"
-                    },
-                    "emojis": {
-                        "type": "array",
-                        "items": {
-                            "type": "string",
-                            "description": "Emoji to react with (Unicode or custom emoji ID)"
-                        },
-                        "description": "List of emojis to add as reactions"
-                    }
-                },
-                "required": ["channel_id", "message_id", "emojis"]
-            }}
-        ),
-        Tool(
-            name="remove_reaction",
-            description="Remove a reaction from a message",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "channel_id": {
-                        "type": "string",
-                        "description": "Channel containing the message"
-                    },
-                    "message_id": {
-                        "type": "string",
-                        "description": "Message to remove reaction from"
-                    },
-                    "emoji": {
-                        "type": "string",
-                        "description": "Emoji to remove (Unicode or custom emoji ID)"
-                    }
-                },
-                "required": ["channel_id", "message_id", "emoji"]
-            }
-        ),
-        Tool(
-            name="send_message",
-            description="Send a message to a specific channel",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "channel_id": {
-                        "type": "string",
-                        "description": "Discord channel ID"
-                    },
-                    "content": {
-                        "type": "string",
-                        "description": "Message content"
-                    }
-                },
-                "required": ["channel_id", "content"]
-            }
-        ),
-        Tool(
-            name="read_messages",
-            description="Read recent messages from a channel",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "channel_id": {
-                        "type": "string",
-                        "description": "Discord channel ID"
-                    },
-                    "limit": {
-                        "type": "number",
-                        "description": "Number of messages to fetch (max 100)",
-                        "minimum": 1,
-                        "maximum": 100
-                    }
-                },
-                "required": ["channel_id"]
-            }
-        ),
-        Tool(
-            name="get_user_info",
-            description="Get information about a Discord user",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "user_id": {
-                        "type": "string",
-                        "description": "Discord user ID"
-                    }
-                },
-                "required": ["user_id"]
-            }
-        ),
-        Tool(
-            name="moderate_message",
-            description="Delete a message and optionally timeout the user",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "channel_id": {
-                        "type": "string",
-                        "description": "Channel ID containing the message"
-                    },
-                    "message_id": {
-                        "type": "string",
-                        "description": "ID of message to moderate"
-                    },
-                    "reason": {
-                        "type": "string",
-                        "description": "Reason for moderation"
-                    },
-                    "timeout_minutes": {
-                        "type": "number",
-                        "description": "Optional timeout duration in minutes",
-                        "minimum": 0,
-                        "maximum": 40320  # Max 4 weeks
-                    }
-                },
-                "required": ["channel_id", "message_id", "reason"]
+# Tool-Registry: Handler, Schema und Argument-Konvertierung pro Tool
+registry = ToolRegistry()
+
+# Server Information Tools
+@registry.register(Tool(
+    name="get_server_info",
+    description="Get information about a Discord server",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "server_id": {
+                "type": "string",
+                "description": "Discord server (guild) ID"
             }
-        ),
-        
-        # User Role Tools
-        Tool(
-            name="get_user_roles",
-            description="Get all roles of a user across all mutual servers",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "user_id": {
-                        "type": "string",
-                        "description": "Discord user ID"
-                    }
+        },
+        "required": ["server_id"]
+    }
+), coerce={"server_id": int}, readonly=True)
+async def get_server_info(server_id: int) -> List[TextContent]:
+    guild = await resolver.guild(server_id)
+    info = {
+        "name": guild.name,
+        "id": str(guild.id),
+        "owner_id": str(guild.owner_id),
+        "member_count": guild.member_count,
+        "created_at": guild.created_at.isoformat(),
+        "description": guild.description,
+        "premium_tier": guild.premium_tier,
+        "explicit_content_filter": str(guild.explicit_content_filter)
+    }
+    return [TextContent(
+        type="text",
+        text=f"Server Information:\n" + "\n".join(f"{k}: {v}" for k, v in info.items())
+    )]
+
+# Projektion für list_members: Feldname -> Wert eines Mitglieds
+_MEMBER_FIELDS = {
+    "id": lambda member: member.id,
+    "name": lambda member: member.name,
+    "nick": lambda member: member.nick,
+    "display_name": lambda member: member.display_name,
+    "joined_at": lambda member: member.joined_at.isoformat() if member.joined_at else None,
+    "roles": lambda member: " ".join(str(role.id) for role in member.roles[1:]),  # Skip @everyone
+    "bot": lambda member: member.bot,
+}
+_DEFAULT_MEMBER_FIELDS = ("name", "id", "roles")
+
+async def _iter_members(guild, after: Optional[int], limit: Optional[int], role_id: Optional[int], priority: int):
+    """Mitglieder aufsteigend nach ID: aus dem Gateway-Cache wenn der Server gechunkt ist, sonst per REST"""
+    if guild.chunked:
+        if role_id is not None:
+            # Kandidaten direkt aus dem Rollen-Index
+            candidates = (guild.get_member(user_id) for user_id in member_index.members_with_role(role_id))
+            candidates = (member for member in candidates if member is not None)
+        else:
+            candidates = guild.members
+        if after is not None:
+            candidates = (member for member in candidates if member.id > after)
+        # Für eine Seite reicht ein Heap über die kleinsten IDs statt komplett zu sortieren
+        if limit is not None:
+            members = heapq.nsmallest(limit, candidates, key=lambda member: member.id)
+        else:
+            members = sorted(candidates, key=lambda member: member.id)
+        for member in members:
+            yield member
+        return
+
+    # Direkt über die HTTP-API: guild.fetch_members liefert jede Seite in umgekehrter Reihenfolge,
+    # dann wären weder die Sortierung noch der Cursor (letzte ID) korrekt
+    state = guild._state
+    page_size = 1000 if limit is None else min(limit, 1000)
+    while True:
+        data = await rest.request(
+            "GET /guilds/{guild_id}/members", guild.id,
+            lambda after=after: state.http.get_members(guild.id, page_size, after), priority
+        )
+        data.sort(key=lambda raw: int(raw["user"]["id"]))
+        for raw in data:
+            yield discord.Member(data=raw, guild=guild, state=state)
+        if len(data) < page_size:
+            return
+        after = int(data[-1]["user"]["id"])
+        if limit is not None:
+            limit -= len(data)
+            if limit <= 0:
+                return
+            page_size = min(limit, 1000)
+
+@registry.register(Tool(
+    name="list_members",
+    description="List members of a server, paginated by user ID or streamed in chunks",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "server_id": {
+                "type": "string",
+                "description": "Discord server (guild) ID"
+            },
+            "limit": {
+                "type": "number",
+                "description": "Maximum number of members to return (default 100, max 1000 per page; unlimited by default when streaming)",
+                "minimum": 1
+            },
+            "after": {
+                "type": "string",
+                "description": "Only members with a user ID greater than this (cursor)"
+            },
+            "fields": {
+                "type": "array",
+                "items": {
+                    "type": "string",
+                    "enum": list(_MEMBER_FIELDS)
                 },
-                "required": ["user_id"]
+                "description": "Fields to include per member (default: name, id, roles)"
+            },
+            "role_id": {
+                "type": "string",
+                "description": "Only members with this role"
+            },
+            "joined_after": {
+                "type": "string",
+                "description": "Only members who joined after this ISO-8601 timestamp"
+            },
+            "bots": {
+                "type": "boolean",
+                "description": "true = only bots, false = only humans (default: both)"
+            },
+            "stream": {
+                "type": "boolean",
+                "description": "Send members as partial results in chunks"
+            },
+            "chunk_size": {
+                "type": "number",
+                "description": "Members per partial result when streaming (default 500)",
+                "minimum": 1,
+                "maximum": 1000
             }
-        ),
-    ]
-    return tools
+        },
+        "required": ["server_id"]
+    }
+), coerce={"server_id": int, "limit": int, "after": int, "role_id": int, "chunk_size": int}, readonly=True)
+async def list_members(
+    server_id: int,
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+    role_id: Optional[int] = None,
+    joined_after: Optional[str] = None,
+    bots: Optional[bool] = None,
+    stream: bool = False,
+    chunk_size: int = 500
+) -> List[TextContent]:
+    guild = await resolver.guild(server_id)
+    await _ensure_chunked(guild)
+    if not stream:
+        limit = min(limit or 100, 1000)
+    chunk_size = max(1, min(chunk_size, 1000))
 
-@app.call_tool()
-@require_discord_client
-async def call_tool(name: str, arguments: Any) -> List[TextContent]:
-    """Handle Discord tool calls."""
-    
-    if name == "send_message":
-        channel = await discord_client.fetch_channel(int(arguments["channel_id"]))
-        message = await channel.send(arguments["content"])
-        return [TextContent(
-            type="text",
-            text=f"Message sent successfully. Message ID: {message.id}"
-        )]
+    fields = tuple(fields or _DEFAULT_MEMBER_FIELDS)
+    unknown = [field for field in fields if field not in _MEMBER_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown member field(s): {', '.join(unknown)}")
+    getters = [(field, _MEMBER_FIELDS[field]) for field in fields]
 
-    elif name == "read_messages":
-        channel = await discord_client.fetch_channel(int(arguments["channel_id"]))
-        limit = min(int(arguments.get("limit", 10)), 100)
-        messages = []
-        async for message in channel.history(limit=limit):
-            reaction_data = []
-            for reaction in message.reactions:
-                try:
-                    emoji_str = (str(reaction.emoji.name) if hasattr(reaction.emoji, 'name') and reaction.emoji.name else str(reaction.emoji.id) if hasattr(reaction.emoji, 'id') else str(reaction.emoji))
-                    reaction_data.append({"emoji": emoji_str, "count": reaction.count})
-                except AttributeError as e:
-                    logger.error(f"Error processing emoji: {e}")
-                continue
-            messages.append({
-                "id": str(message.id),
-                "author": str(message.author),
-                "content": message.content,
-                "timestamp": message.created_at.isoformat(),
-                "reactions": reaction_data
-            })
-
-        formatted_messages = []
-        for m in messages:
-            reaction_text = "No reactions"
-            if m['reactions']:
-                reactions = [f"{r['emoji']}({r['count']})" for r in m['reactions']]
-                reaction_text = ", ".join(reactions)
-            
-            message_text = (
-                f"{m['author']} ({m['timestamp']}):\n"
-                f"{m['content']}\n"
-                f"Reactions: {reaction_text}"
-            )
-            formatted_messages.append(message_text)
+    joined_bound = None
+    if joined_after is not None:
+        joined_bound = datetime.fromisoformat(joined_after)
+        if joined_bound.tzinfo is None:
+            joined_bound = joined_bound.replace(tzinfo=timezone.utc)
 
-        return [TextContent(
-            type="text",
-            text=f"Retrieved {len(messages)} messages:\n\n" + "\n\n".join(formatted_messages)
-        )]
+    def matches(member) -> bool:
+        if bots is not None and member.bot != bots:
+            return False
+        if role_id is not None and member.get_role(role_id) is None:
+            return False
+        if joined_bound is not None and (member.joined_at is None or member.joined_at <= joined_bound):
+            return False
+        return True
 
-    elif name == "get_user_info":
-        user = await discord_client.fetch_user(int(arguments["user_id"]))
-        user_info = {
-            "id": str(user.id),
-            "name": user.name,
-            "discriminator": user.discriminator,
-            "bot": user.bot,
-            "created_at": user.created_at.isoformat()
-        }
+    # Ohne Filter begrenzt schon die Quelle auf eine Seite
+    has_filter = bots is not None or joined_bound is not None or (role_id is not None and not guild.chunked)
+    source_limit = None if has_filter else limit
+
+    # Im Streaming-Modus wird nie mehr als ein Chunk im Speicher gehalten
+    count = 0
+    chunks_sent = 0
+    last_id = None
+    lines = []
+    async for member in _iter_members(guild, after, source_limit, role_id, BULK if stream else INTERACTIVE):
+        if not matches(member):
+            continue
+        lines.append(", ".join(f"{field}: {getter(member)}" for field, getter in getters))
+        count += 1
+        last_id = member.id
+        if stream and len(lines) >= chunk_size and await app.send_partial(
+            [TextContent(type="text", text="\n".join(lines))]
+        ):
+            lines = []
+            chunks_sent += 1
+        if limit is not None and count >= limit:
+            break
+
+    # Nächster Cursor, falls die Seite voll war
+    cursor_text = f"\n\nNext cursor: after={last_id}" if count and count == limit else ""
+
+    if stream:
+        if lines and await app.send_partial([TextContent(type="text", text="\n".join(lines))]):
+            lines = []
+            chunks_sent += 1
+        remaining = "\n" + "\n".join(lines) if lines else ""
         return [TextContent(
             type="text",
-            text=f"User information:\n" + f"Name: {user_info['name']}#{user_info['discriminator']}\n" + f"ID: {user_info['id']}\n" + f"Bot: {user_info['bot']}\n" + f"Created: {user_info['created_at']}"
+            text=f"Streamed {count} members in {chunks_sent} chunks." + remaining + cursor_text
         )]
 
-    elif name == "moderate_message":
-        channel = await discord_client.fetch_channel(int(arguments["channel_id"]))
-        message = await channel.fetch_message(int(arguments["message_id"]))
-        
-        # Delete the message
-        await message.delete(reason=arguments["reason"])
-        
-        # Handle timeout if specified
-        if "timeout_minutes" in arguments and arguments["timeout_minutes"] > 0:
-            if isinstance(message.author, discord.Member):
-                try:
-                    duration = discord.utils.utcnow() + timedelta(
-                        minutes=arguments["timeout_minutes"]
+    return [TextContent(
+        type="text",
+        text=f"Server Members ({count}):\n" + "\n".join(lines) + cursor_text
+    )]
+
+# Role Management Tools
+@registry.register(Tool(
+    name="add_role",
+    description="Add a role to a user",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "server_id": {
+                "type": "string",
+                "description": "Discord server ID"
+            },
+            "user_id": {
+                "type": "string",
+                "description": "User to add role to"
+            },
+            "role_id": {
+                "type": "string",
+                "description": "Role ID to add"
+            }
+        },
+        "required": ["server_id", "user_id", "role_id"]
+    }
+), coerce={"server_id": int, "user_id": int, "role_id": int})
+async def add_role(server_id: int, user_id: int, role_id: int) -> List[TextContent]:
+    guild = await resolver.guild(server_id)
+    member = await resolver.member(guild, user_id)
+    role = guild.get_role(role_id)
+
+    await rest.request(
+        "PUT /guilds/{guild_id}/members/{user_id}/roles/{role_id}", guild.id,
+        lambda: member.add_roles(role, reason="Role added via MCP"),
+    )
+    resolver.invalidate_member(guild.id, user_id)
+    return [TextContent(
+        type="text",
+        text=f"Added role {role.name} to user {member.name}"
+    )]
+
+@registry.register(Tool(
+    name="remove_role",
+    description="Remove a role from a user",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "server_id": {
+                "type": "string",
+                "description": "Discord server ID"
+            },
+            "user_id": {
+                "type": "string",
+                "description": "User to remove role from"
+            },
+            "role_id": {
+                "type": "string",
+                "description": "Role ID to remove"
+            }
+        },
+        "required": ["server_id", "user_id", "role_id"]
+    }
+), coerce={"server_id": int, "user_id": int, "role_id": int})
+async def remove_role(server_id: int, user_id: int, role_id: int) -> List[TextContent]:
+    guild = await resolver.guild(server_id)
+    member = await resolver.member(guild, user_id)
+    role = guild.get_role(role_id)
+
+    await rest.request(
+        "DELETE /guilds/{guild_id}/members/{user_id}/roles/{role_id}", guild.id,
+        lambda: member.remove_roles(role, reason="Role removed via MCP"),
+    )
+    resolver.invalidate_member(guild.id, user_id)
+    return [TextContent(
+        type="text",
+        text=f"Removed role {role.name} from user {member.name}"
+    )]
+
+def _roles_to_change(member, roles: List[Any], add: bool) -> List[Any]:
+    """Rollen, die dem Mitglied fehlen (add) bzw. die es hat (remove)"""
+    member_roles = {role.id for role in member.roles}
+    return [role for role in roles if (role.id not in member_roles) == add]
+
+async def _bulk_apply_roles(
+    server_id: int,
+    user_ids: List[int],
+    role_ids: List[int],
+    add: bool,
+    reason: str,
+    concurrency: int
+) -> str:
+    """Vergibt bzw. entzieht Rollen für viele Mitglieder über einen begrenzten Worker-Pool"""
+    guild = await resolver.guild(server_id)
+    roles = []
+    for role_id in dict.fromkeys(role_ids):
+        role = guild.get_role(role_id)
+        if role is None:
+            raise ValueError(f"Unknown role: {role_id}")
+        roles.append(role)
+
+    user_ids = list(dict.fromkeys(user_ids))
+    total = len(user_ids)
+    slots = asyncio.Semaphore(max(1, min(concurrency, 50)))
+    changed = 0
+    unchanged = 0
+    failed: List[str] = []
+    completed = 0
+    # Fortschritt etwa alle 10 %
+    report_every = max(1, total // 10)
+
+    async def apply(user_id: int) -> None:
+        nonlocal changed, unchanged, completed
+        async with slots:
+            try:
+                member = await resolver.member(guild, user_id)
+                todo = _roles_to_change(member, roles, add)
+                if len(todo) > 1:
+                    # Mehrere Rollen: ein PATCH ersetzt die vollständige Rollenliste. Sie wird aus einem
+                    # frisch geholten Mitglied gebildet, damit ein veralteter Cache-Stand keine Rollen entfernt
+                    member = await rest.request(
+                        "GET /guilds/{guild_id}/members/{user_id}", guild.id,
+                        lambda: guild.fetch_member(user_id), BULK,
+                    )
+                    todo = _roles_to_change(member, roles, add)
+                if not todo:
+                    unchanged += 1
+                elif len(todo) == 1:
+                    # Eine Rolle: PUT/DELETE auf die Rolle, unabhängig vom Cache-Stand
+                    route = "PUT" if add else "DELETE"
+                    call = member.add_roles if add else member.remove_roles
+                    await rest.request(
+                        route + " /guilds/{guild_id}/members/{user_id}/roles/{role_id}", guild.id,
+                        lambda: call(todo[0], reason=reason), BULK,
                     )
-                    await message.author.timeout(
-                        duration,
-                        reason=arguments["reason"]
+                    changed += 1
+                else:
+                    call = member.add_roles if add else member.remove_roles
+                    await rest.request(
+                        "PATCH /guilds/{guild_id}/members/{user_id}", guild.id,
+                        lambda: call(*todo, reason=reason, atomic=False), BULK,
                     )
-                    return [TextContent(
+                    changed += 1
+                if todo:
+                    # Member.edit liefert ein neues Objekt; der REST-Cache hielte sonst den alten Stand
+                    resolver.invalidate_member(guild.id, user_id)
+            except Exception as e:
+                # Ein fehlgeschlagenes Mitglied darf den Rest des Batches nicht abbrechen
+                failed.append(f"{user_id}: {e}")
+            completed += 1
+            if completed % report_every == 0 and completed < total:
+                await app.send_partial([TextContent(
                     type="text",
-                    text=f"Message deleted and user timed out for {arguments['timeout_minutes']} minutes."
-                )]
-                except discord.Forbidden:
-                    return [TextContent(
-                        type="text",
-                        text="Message deleted but lacking permissions to timeout user."
-                    )]
-        
-        return [TextContent(
-            type="text",
-            text="Message deleted successfully."
-        )]
+                    text=f"Progress: {completed}/{total} members processed, {len(failed)} failed"
+                )])
 
-    # Server Information Tools
-    elif name == "get_server_info":
-        guild = await discord_client.fetch_guild(int(arguments["server_id"]))
-        info = {
-            "name": guild.name,
-            "id": str(guild.id),
-            "owner_id": str(guild.owner_id),
-            "member_count": guild.member_count,
-            "created_at": guild.created_at.isoformat(),
-            "description": guild.description,
-            "premium_tier": guild.premium_tier,
-            "explicit_content_filter": str(guild.explicit_content_filter)
+    await asyncio.gather(*(apply(user_id) for user_id in user_ids))
+
+    verb = "Added" if add else "Removed"
+    summary = (
+        f"{verb} roles {', '.join(role.name for role in roles)} for {total} members: "
+        f"{changed} changed, {unchanged} unchanged, {len(failed)} failed."
+    )
+    if failed:
+        summary += "\nFailures:\n" + "\n".join(failed[:20])
+        if len(failed) > 20:
+            summary += f"\n... and {len(failed) - 20} more"
+    return summary
+
+_BULK_ROLE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "server_id": {
+            "type": "string",
+            "description": "Discord server ID"
+        },
+        "user_ids": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "Users to update"
+        },
+        "role_ids": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "Roles to add or remove"
+        },
+        "reason": {
+            "type": "string",
+            "description": "Reason for the audit log"
+        },
+        "concurrency": {
+            "type": "number",
+            "description": "Members processed in parallel (default: 10)",
+            "minimum": 1,
+            "maximum": 50
         }
-        return [TextContent(
-            type="text",
-            text=f"Server Information:\n" + "\n".join(f"{k}: {v}" for k, v in info.items())
-        )]
+    },
+    "required": ["server_id", "user_ids", "role_ids"]
+}
+_BULK_ROLE_COERCE = {
+    "server_id": int,
+    "user_ids": lambda ids: [int(i) for i in ids],
+    "role_ids": lambda ids: [int(i) for i in ids],
+    "concurrency": int,
+}
 
-    elif name == "list_members":
-        guild = await discord_client.fetch_guild(int(arguments["server_id"]))
-        limit = min(int(arguments.get("limit", 100)), 1000)
-        
-        members = []
-        async for member in guild.fetch_members(limit=limit):
-            members.append({
-                "id": str(member.id),
-                "name": member.name,
-                "nick": member.nick,
-                "joined_at": member.joined_at.isoformat() if member.joined_at else None,
-                "roles": [str(role.id) for role in member.roles[1:]]  # Skip @everyone
-            })
-        
-        return [TextContent(
-            type="text",
-            text=f"Server Members ({len(members)}):\n" + "\n".join(f"{m['name']} (ID: {m['id']}, Roles: {', '.join(m['roles'])})" for m in members)
-        )]
+@registry.register(Tool(
+    name="bulk_add_roles",
+    description="Add one or more roles to many users at once",
+    inputSchema=_BULK_ROLE_SCHEMA
+), coerce=_BULK_ROLE_COERCE)
+async def bulk_add_roles(
+    server_id: int,
+    user_ids: List[int],
+    role_ids: List[int],
+    reason: str = "Roles added via MCP",
+    concurrency: int = 10
+) -> List[TextContent]:
+    summary = await _bulk_apply_roles(server_id, user_ids, role_ids, True, reason, concurrency)
+    return [TextContent(type="text", text=summary)]
 
-    # Role Management Tools
-    elif name == "add_role":
-        guild = await discord_client.fetch_guild(int(arguments["server_id"]))
-        member = await guild.fetch_member(int(arguments["user_id"]))
-        role = guild.get_role(int(arguments["role_id"]))
-        
-        await member.add_roles(role, reason="Role added via MCP")
-        return [TextContent(
-            type="text",
-            text=f"Added role {role.name} to user {member.name}"
-        )]
+@registry.register(Tool(
+    name="bulk_remove_roles",
+    description="Remove one or more roles from many users at once",
+    inputSchema=_BULK_ROLE_SCHEMA
+), coerce=_BULK_ROLE_COERCE)
+async def bulk_remove_roles(
+    server_id: int,
+    user_ids: List[int],
+    role_ids: List[int],
+    reason: str = "Roles removed via MCP",
+    concurrency: int = 10
+) -> List[TextContent]:
+    summary = await _bulk_apply_roles(server_id, user_ids, role_ids, False, reason, concurrency)
+    return [TextContent(type="text", text=summary)]
 
-    elif name == "remove_role":
-        guild = await discord_client.fetch_guild(int(arguments["server_id"]))
-        member = await guild.fetch_member(int(arguments["user_id"]))
-        role = guild.get_role(int(arguments["role_id"]))
-        
-        await member.remove_roles(role, reason="Role removed via MCP")
+# Channel Management Tools
+@registry.register(Tool(
+    name="create_text_channel",
+    description="Create a new text channel",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "server_id": {
+                "type": "string",
+                "description": "Discord server ID"
+            },
+            "name": {
+                "type": "string",
+                "description": "Channel name"
+            },
+            "category_id": {
+                "type": "string",
+                "description": "Optional category ID to place channel in"
+            },
+            "topic": {
+                "type": "string",
+                "description": "Optional channel topic"
+            }
+        },
+        "required": ["server_id", "name"]
+    }
+), coerce={"server_id": int, "category_id": int})
+async def create_text_channel(
+    server_id: int,
+    name: str,
+    category_id: Optional[int] = None,
+    topic: Optional[str] = None
+) -> List[TextContent]:
+    guild = await resolver.guild(server_id)
+    category = None
+    if category_id is not None:
+        category = guild.get_channel(category_id)
+
+    channel = await rest.request("POST /guilds/{guild_id}/channels", guild.id, lambda: guild.create_text_channel(
+        name=name,
+        category=category,
+        topic=topic,
+        reason="Channel created via MCP"
+    ))
+
+    return [TextContent(
+        type="text",
+        text=f"Created text channel #{channel.name} (ID: {channel.id})"
+    )]
+
+@registry.register(Tool(
+    name="delete_channel",
+    description="Delete a channel",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "channel_id": {
+                "type": "string",
+                "description": "ID of channel to delete"
+            },
+            "reason": {
+                "type": "string",
+                "description": "Reason for deletion"
+            }
+        },
+        "required": ["channel_id"]
+    }
+), coerce={"channel_id": int})
+async def delete_channel(channel_id: int, reason: str = "Channel deleted via MCP") -> List[TextContent]:
+    channel = await resolver.channel(channel_id)
+    await rest.request("DELETE /channels/{channel_id}", channel.id, lambda: channel.delete(reason=reason))
+    resolver.invalidate_channel(channel.id)
+    return [TextContent(
+        type="text",
+        text=f"Deleted channel successfully"
+    )]
+
+def _reaction_key(emoji) -> Any:
+    """Vergleichsschlüssel eines Emojis: ID bei Custom-Emojis, sonst der Unicode-Name"""
+    if isinstance(emoji, str):
+        emoji = discord.PartialEmoji.from_str(emoji)
+    return getattr(emoji, "id", None) or emoji.name
+
+async def _apply_reactions(message, emojis: List[str], action: str) -> tuple:
+    """Reaktions-Engine: ein Request pro Emoji, gepipelined im Reaktions-Bucket.
+
+    action ist "add", "remove" (eigene Reaktion) oder "clear" (alle Nutzer). Emojis, für die
+    laut message.reactions nichts zu tun ist, werden übersprungen.
+    Gibt (erfolgreich, übersprungen, [(emoji, Fehler)]) zurück.
+    """
+    reactions = {_reaction_key(reaction.emoji): reaction for reaction in message.reactions}
+    pending: Dict[Any, str] = {}
+    skipped = []
+    seen = set()
+    # Doppelte Emojis (auch verschieden geschriebene desselben Custom-Emojis) nur einmal behandeln
+    for emoji in dict.fromkeys(emojis):
+        key = _reaction_key(emoji)
+        if key in seen:
+            continue
+        seen.add(key)
+        reaction = reactions.get(key)
+        if action == "add":
+            needed = reaction is None or not reaction.me
+        elif action == "remove":
+            needed = reaction is not None and reaction.me
+        else:
+            needed = reaction is not None
+        if needed:
+            pending[key] = emoji
+        else:
+            skipped.append(emoji)
+
+    if action == "add":
+        route, call = "PUT /channels/{channel_id}/messages/{message_id}/reactions", message.add_reaction
+    elif action == "remove":
+        route = "DELETE /channels/{channel_id}/messages/{message_id}/reactions"
+        call = lambda emoji: message.remove_reaction(emoji, discord_client.user)
+    else:
+        route, call = "DELETE /channels/{channel_id}/messages/{message_id}/reactions", message.clear_reaction
+
+    results = await asyncio.gather(
+        *(rest.request(route, message.channel.id, lambda emoji=emoji: call(emoji), BULK) for emoji in pending.values()),
+        return_exceptions=True
+    )
+    # message.reactions ist nach den Requests veraltet
+    resolver.invalidate_message(message.channel.id, message.id)
+
+    done = []
+    failed = []
+    for emoji, result in zip(pending.values(), results):
+        if isinstance(result, asyncio.CancelledError):
+            raise result
+        if isinstance(result, Exception):
+            failed.append((emoji, result))
+        else:
+            done.append(emoji)
+    return done, skipped, failed
+
+def _reaction_summary(verb: str, done: List[str], skipped: List[str], skip_reason: str, failed: List[tuple]) -> str:
+    lines = [f"{verb} {len(done)} reactions" + (f": {', '.join(done)}" if done else "")]
+    if skipped:
+        lines.append(f"Skipped ({skip_reason}): {', '.join(skipped)}")
+    for emoji, error in failed:
+        lines.append(f"Failed {emoji}: {error}")
+    return "\n".join(lines)
+
+# Message Reaction Tools
+@registry.register(Tool(
+    name="add_reaction",
+    description="Add a reaction to a message",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "channel_id": {
+                "type": "string",
+                "description": "Channel containing the message"
+            },
+            "message_id": {
+                "type": "string",
+                "description": "Message to react to"
+            },
+            "emoji": {
+                "type": "string",
+                "description": "Emoji to react with (Unicode or custom emoji ID)"
+            }
+        },
+        "required": ["channel_id", "message_id", "emoji"]
+    }
+), coerce={"channel_id": int, "message_id": int})
+async def add_reaction(channel_id: int, message_id: int, emoji: str) -> List[TextContent]:
+    try:
+        message = await resolver.message(channel_id, message_id)
+        await rest.request(
+            "PUT /channels/{channel_id}/messages/{message_id}/reactions", channel_id,
+            lambda: message.add_reaction(emoji),
+        )
         return [TextContent(
             type="text",
-            text=f"Removed role {role.name} from user {member.name}"
+            text=f"Added reaction {emoji} to message"
         )]
-
-    # Channel Management Tools
-    elif name == "create_text_channel":
-        guild = await discord_client.fetch_guild(int(arguments["server_id"]))
-        category = None
-        if "category_id" in arguments:
-            category = guild.get_channel(int(arguments["category_id"]))
-        
-        channel = await guild.create_text_channel(
-            name=arguments["name"],
-            category=category,
-            topic=arguments.get("topic"),
-            reason="Channel created via MCP"
-        )
-        
+    except discord.HTTPException as e:
         return [TextContent(
             type="text",
-            text=f"Created text channel #{channel.name} (ID: {channel.id})"
+            text=f"Failed to add reaction: {str(e)}"
         )]
 
-    elif name == "delete_channel":
-        channel = await discord_client.fetch_channel(int(arguments["channel_id"]))
-        await channel.delete(reason=arguments.get("reason", "Channel deleted via MCP"))
+@registry.register(Tool(
+    name="add_multiple_reactions",
+    description="Add multiple reactions to a message",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "channel_id": {
+                "type": "string",
+                "description": "Channel containing the message"
+            },
+            "message_id": {
+                "type": "string",
+                "description": "Message to react to"
+            },
+            "emojis": {
+                "type": "array",
+                "items": {
+                    "type": "string",
+                    "description": "Emoji to react with (Unicode or custom emoji ID)"
+                },
+                "description": "List of emojis to add as reactions"
+            }
+        },
+        "required": ["channel_id", "message_id", "emojis"]
+    }
+), coerce={"channel_id": int, "message_id": int})
+async def add_multiple_reactions(channel_id: int, message_id: int, emojis: List[str]) -> List[TextContent]:
+    message = await resolver.message(channel_id, message_id)
+    done, skipped, failed = await _apply_reactions(message, emojis, "add")
+    return [TextContent(
+        type="text",
+        text=_reaction_summary("Added", done, skipped, "already reacted", failed)
+    )]
+
+@registry.register(Tool(
+    name="remove_reaction",
+    description="Remove a reaction from a message",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "channel_id": {
+                "type": "string",
+                "description": "Channel containing the message"
+            },
+            "message_id": {
+                "type": "string",
+                "description": "Message to remove reaction from"
+            },
+            "emoji": {
+                "type": "string",
+                "description": "Emoji to remove (Unicode or custom emoji ID)"
+            }
+        },
+        "required": ["channel_id", "message_id", "emoji"]
+    }
+), coerce={"channel_id": int, "message_id": int})
+async def remove_reaction(channel_id: int, message_id: int, emoji: str) -> List[TextContent]:
+    message = await resolver.message(channel_id, message_id)
+    await rest.request(
+        "DELETE /channels/{channel_id}/messages/{message_id}/reactions", channel_id,
+        lambda: message.remove_reaction(emoji, discord_client.user),
+    )
+    return [TextContent(
+        type="text",
+        text=f"Removed reaction {emoji} from message"
+    )]
+
+@registry.register(Tool(
+    name="remove_multiple_reactions",
+    description="Remove several of the bot's own reactions from a message",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "channel_id": {
+                "type": "string",
+                "description": "Channel containing the message"
+            },
+            "message_id": {
+                "type": "string",
+                "description": "Message to remove reactions from"
+            },
+            "emojis": {
+                "type": "array",
+                "items": {
+                    "type": "string",
+                    "description": "Emoji to remove (Unicode or custom emoji ID)"
+                },
+                "description": "List of emojis to remove"
+            }
+        },
+        "required": ["channel_id", "message_id", "emojis"]
+    }
+), coerce={"channel_id": int, "message_id": int})
+async def remove_multiple_reactions(channel_id: int, message_id: int, emojis: List[str]) -> List[TextContent]:
+    message = await resolver.message(channel_id, message_id)
+    done, skipped, failed = await _apply_reactions(message, emojis, "remove")
+    return [TextContent(
+        type="text",
+        text=_reaction_summary("Removed", done, skipped, "not reacted", failed)
+    )]
+
+@registry.register(Tool(
+    name="clear_reactions",
+    description="Remove all reactions from a message, or all reactions of the given emojis",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "channel_id": {
+                "type": "string",
+                "description": "Channel containing the message"
+            },
+            "message_id": {
+                "type": "string",
+                "description": "Message to clear reactions from"
+            },
+            "emojis": {
+                "type": "array",
+                "items": {
+                    "type": "string",
+                    "description": "Emoji to clear (Unicode or custom emoji ID)"
+                },
+                "description": "Only clear these emojis (default: all reactions)"
+            }
+        },
+        "required": ["channel_id", "message_id"]
+    }
+), coerce={"channel_id": int, "message_id": int})
+async def clear_reactions(channel_id: int, message_id: int, emojis: Optional[List[str]] = None) -> List[TextContent]:
+    message = await resolver.message(channel_id, message_id)
+    if emojis:
+        done, skipped, failed = await _apply_reactions(message, emojis, "clear")
         return [TextContent(
             type="text",
-            text=f"Deleted channel successfully"
+            text=_reaction_summary("Cleared", done, skipped, "no reactions", failed)
         )]
 
-    # Message Reaction Tools
-    elif name == "add_reaction":
+    # Alle Reaktionen mit einem einzigen Request entfernen
+    await rest.request(
+        "DELETE /channels/{channel_id}/messages/{message_id}/reactions", channel_id, message.clear_reactions
+    )
+    resolver.invalidate_message(channel_id, message_id)
+    return [TextContent(
+        type="text",
+        text="Cleared all reactions from message"
+    )]
+
+# Message Tools
+@registry.register(Tool(
+    name="send_message",
+    description="Send a message to a specific channel",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "channel_id": {
+                "type": "string",
+                "description": "Discord channel ID"
+            },
+            "content": {
+                "type": "string",
+                "description": "Message content"
+            }
+        },
+        "required": ["channel_id", "content"]
+    }
+), coerce={"channel_id": int})
+async def send_message(channel_id: int, content: str) -> List[TextContent]:
+    channel = await resolver.channel(channel_id)
+    message = await rest.request("POST /channels/{channel_id}/messages", channel_id, lambda: channel.send(content))
+    return [TextContent(
+        type="text",
+        text=f"Message sent successfully. Message ID: {message.id}"
+    )]
+
+def _emoji_name(emoji) -> str:
+    """Name eines Emojis, bei Custom-Emojis ohne Namen die ID"""
+    return (str(emoji.name) if hasattr(emoji, 'name') and emoji.name else str(emoji.id) if hasattr(emoji, 'id') else str(emoji))
+
+def _message_reactions(message) -> List[tuple]:
+    """Emoji und Anzahl aller Reaktionen einer Nachricht"""
+    reaction_data = []
+    for reaction in message.reactions:
         try:
-            channel = await discord_client.fetch_channel(int(arguments["channel_id"]))
-            message = await channel.fetch_message(int(arguments["message_id"]))
-            await message.add_reaction(arguments["emoji"])
-            return [TextContent(
-                type="text",
-                text=f"Added reaction {arguments['emoji']} to message"
-            )]
-        except discord.HTTPException as e:
+            reaction_data.append((_emoji_name(reaction.emoji), reaction.count))
+        except AttributeError as e:
+            logger.error(f"Error processing emoji: {e}")
+    return reaction_data
+
+def _format_message(message_id: Any, author: str, timestamp: str, content: str, reactions: List[tuple]) -> str:
+    """Textdarstellung einer Nachricht für read_messages"""
+    reaction_text = "No reactions"
+    if reactions:
+        reaction_text = ", ".join(f"{emoji}({count})" for emoji, count in reactions)
+    return (
+        f"{author} ({timestamp}) [ID: {message_id}]:\n"
+        f"{content}\n"
+        f"Reactions: {reaction_text}"
+    )
+
+def _history(channel, priority: int = INTERACTIVE, **history_kwargs):
+    """channel.history, getaktet über den Bucket der Route (ein Job pro Seite)"""
+    return rest.paced("GET /channels/{channel_id}/messages", channel.id, channel.history(**history_kwargs), priority=priority)
+
+async def _fetch_history(channel, priority: int = INTERACTIVE, **history_kwargs) -> List[Any]:
+    """Holt History remote und legt sie im Nachrichtenspeicher ab"""
+    messages = [message async for message in _history(channel, priority, **history_kwargs)]
+    message_store.stats["remote_fetches"] += 1
+    message_store.upsert((message, _message_reactions(message)) for message in messages)
+    return messages
+
+async def _sync_channel_head(channel, limit: int) -> None:
+    """Bringt den gespeicherten Bereich eines Channels bis zur neuesten Nachricht auf Stand"""
+    sync = message_store.sync_range(channel.id)
+    if sync is not None and message_store.is_live(channel.id):
+        return
+
+    # Ab jetzt erweitern Gateway-Nachrichten den Bereich
+    message_store.mark_live(channel.id)
+    try:
+        if sync is not None:
+            newest_id = sync[1]
+            gap = await _fetch_history(
+                channel, limit=MESSAGE_STORE_MAX_GAP, after=discord.Object(id=newest_id), oldest_first=True
+            )
+            if len(gap) < MESSAGE_STORE_MAX_GAP:
+                if gap:
+                    message_store.extend_sync_range(channel.id, newest_id=gap[-1].id)
+                return
+            # Lücke zu groß - Bereich neu aufbauen
+            logger.info(f"History gap in channel {channel.id} too large, resyncing")
+
+        messages = await _fetch_history(channel, limit=limit)
+        if messages:
+            message_store.set_sync_range(channel.id, messages[-1].id, messages[0].id, len(messages) < limit)
+        else:
+            message_store.set_sync_range(channel.id, 0, 0, True)
+    except BaseException:
+        # Ohne geschlossene Lücke dürfen Gateway-Nachrichten den Bereich nicht über die fehlenden
+        # Nachrichten hinweg erweitern; beim nächsten Lesen wird neu synchronisiert
+        message_store.drop_sync_range(channel.id)
+        raise
+
+async def _read_stored_messages(
+    channel,
+    limit: int,
+    before: Optional[int],
+    after: Optional[int]
+) -> Optional[List[tuple]]:
+    """Beantwortet read_messages aus dem Speicher; None wenn remote gelesen werden muss"""
+    lock = _channel_sync_locks.setdefault(channel.id, asyncio.Lock())
+    async with lock:
+        await _sync_channel_head(channel, limit)
+        oldest_id, _, complete = message_store.sync_range(channel.id)
+
+        if after is not None:
+            if after < oldest_id and not complete:
+                return None
+            return message_store.read(channel.id, limit, after=after)
+
+        if before is not None and before < oldest_id and not complete:
+            return None
+        rows = [row for row in message_store.read(channel.id, limit, before=before) if row[0] >= oldest_id]
+        if len(rows) < limit and not complete:
+            # Ältere Nachrichten an den Bereich anhängen
+            missing = limit - len(rows)
+            older = await _fetch_history(channel, limit=missing, before=discord.Object(id=oldest_id))
+            if older:
+                oldest_id = older[-1].id
+            message_store.extend_sync_range(channel.id, oldest_id=oldest_id, complete=len(older) < missing)
+            rows = [row for row in message_store.read(channel.id, limit, before=before) if row[0] >= oldest_id]
+        return rows
+
+@registry.register(Tool(
+    name="read_messages",
+    description="Read messages from a channel, paginated with before/after/around cursors or streamed in chunks",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "channel_id": {
+                "type": "string",
+                "description": "Discord channel ID"
+            },
+            "limit": {
+                "type": "number",
+                "description": "Number of messages to fetch (max 100 per page, unlimited when streaming)",
+                "minimum": 1
+            },
+            "before": {
+                "type": "string",
+                "description": "Only messages older than this message ID (cursor)"
+            },
+            "after": {
+                "type": "string",
+                "description": "Only messages newer than this message ID, oldest first (cursor)"
+            },
+            "around": {
+                "type": "string",
+                "description": "Messages around this message ID (max 100, no streaming)"
+            },
+            "stream": {
+                "type": "boolean",
+                "description": "Send messages as partial results in chunks while they are read"
+            },
+            "chunk_size": {
+                "type": "number",
+                "description": "Messages per partial result when streaming (default 50)",
+                "minimum": 1,
+                "maximum": 100
+            }
+        },
+        "required": ["channel_id"]
+    }
+), coerce={"channel_id": int, "limit": int, "before": int, "after": int, "around": int, "chunk_size": int}, readonly=True)
+async def read_messages(
+    channel_id: int,
+    limit: int = 10,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+    around: Optional[int] = None,
+    stream: bool = False,
+    chunk_size: int = 50
+) -> List[TextContent]:
+    if around is not None and (before is not None or after is not None or stream):
+        raise ValueError("around cannot be combined with before, after or stream")
+
+    channel = await resolver.channel(channel_id)
+    if not stream:
+        limit = min(limit, 100)
+    chunk_size = max(1, min(chunk_size, 100))
+
+    history_kwargs = {"limit": limit}
+    if before is not None:
+        history_kwargs["before"] = discord.Object(id=before)
+    if after is not None:
+        history_kwargs["after"] = discord.Object(id=after)
+    if around is not None:
+        history_kwargs["around"] = discord.Object(id=around)
+    # discord.py liefert mit "after" die ältesten Nachrichten zuerst
+    oldest_first = after is not None and around is None
+
+    # Aus dem lokalen Speicher lesen, nur die Lücke wird remote geholt
+    if message_store is not None and not stream and around is None:
+        rows = await _read_stored_messages(channel, limit, before, after)
+        if rows is not None:
+            formatted_messages = [_format_message(*row) for row in rows]
+            cursor_text = ""
+            if rows and len(rows) == limit:
+                cursor_text = f"\n\nNext cursor: {'after' if oldest_first else 'before'}={rows[-1][0]}"
             return [TextContent(
                 type="text",
-                text=f"Failed to add reaction: {str(e)}"
+                text=f"Retrieved {len(rows)} messages:\n\n" + "\n\n".join(formatted_messages) + cursor_text
             )]
 
-    elif name == "add_multiple_reactions":
-        channel = await discord_client.fetch_channel(int(arguments["channel_id"]))
-        message = await channel.fetch_message(int(arguments["message_id"]))
-        for emoji in arguments["emojis"]:
-            await message.add_reaction(emoji)
+    # Im Streaming-Modus wird nie mehr als ein Chunk im Speicher gehalten
+    count = 0
+    chunks_sent = 0
+    last_id = None
+    formatted_messages = []
+    to_store = []
+    # Lange Streams sollen interaktive Calls im selben Bucket nicht ausbremsen
+    async for message in _history(channel, BULK if stream else INTERACTIVE, **history_kwargs):
+        reactions = _message_reactions(message)
+        if message_store is not None:
+            to_store.append((message, reactions))
+        formatted_messages.append(_format_message(
+            message.id,
+            str(message.author),
+            message.created_at.isoformat(),
+            message.content,
+            reactions
+        ))
+        count += 1
+        last_id = message.id
+        if len(to_store) >= chunk_size:
+            message_store.upsert(to_store)
+            to_store = []
+        if stream and len(formatted_messages) >= chunk_size and await app.send_partial(
+            [TextContent(type="text", text="\n\n".join(formatted_messages))]
+        ):
+            formatted_messages = []
+            chunks_sent += 1
+
+    if to_store:
+        message_store.upsert(to_store)
+
+    # Nächster Cursor, falls die Seite voll war
+    cursor_text = ""
+    if count and count == limit and around is None:
+        cursor_text = f"\n\nNext cursor: {'after' if oldest_first else 'before'}={last_id}"
+
+    if stream:
+        if formatted_messages and await app.send_partial(
+            [TextContent(type="text", text="\n\n".join(formatted_messages))]
+        ):
+            formatted_messages = []
+            chunks_sent += 1
+        # Ohne laufenden Transport (z.B. direkter Aufruf) kommt der Rest in die finale Antwort
+        remaining_text = "\n\n" + "\n\n".join(formatted_messages) if formatted_messages else ""
         return [TextContent(
             type="text",
-            text=f"Added reactions: {', '.join(arguments['emojis'])} to message"
+            text=f"Streamed {count} messages in {chunks_sent} chunks." + remaining_text + cursor_text
         )]
 
-    elif name == "remove_reaction":
-        channel = await discord_client.fetch_channel(int(arguments["channel_id"]))
-        message = await channel.fetch_message(int(arguments["message_id"]))
-        await message.remove_reaction(arguments["emoji"], discord_client.user)
+    return [TextContent(
+        type="text",
+        text=f"Retrieved {count} messages:\n\n" + "\n\n".join(formatted_messages) + cursor_text
+    )]
+
+def _snowflake_bound(timestamp: str, high: bool) -> int:
+    """ISO-8601-Zeitpunkt als Snowflake-Grenze für Zeitfilter"""
+    moment = datetime.fromisoformat(timestamp)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return discord.utils.time_snowflake(moment, high=high)
+
+async def _backfill_channel(channel, count: int) -> int:
+    """Lädt bis zu count ältere Nachrichten eines Channels in den Speicher"""
+    lock = _channel_sync_locks.setdefault(channel.id, asyncio.Lock())
+    async with lock:
+        sync = message_store.sync_range(channel.id)
+        if sync is None:
+            await _sync_channel_head(channel, min(count, 100))
+            sync = message_store.sync_range(channel.id)
+            count -= min(count, 100)
+        oldest_id, _, complete = sync
+        if count <= 0 or complete:
+            return message_store.count(channel.id)
+        older = await _fetch_history(channel, BULK, limit=count, before=discord.Object(id=oldest_id))
+        message_store.extend_sync_range(
+            channel.id,
+            oldest_id=older[-1].id if older else None,
+            complete=len(older) < count
+        )
+    return message_store.count(channel.id)
+
+@registry.register(Tool(
+    name="search_messages",
+    description="Full-text search over locally stored channel history (requires MESSAGE_STORE_PATH)",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "Search terms (all must match, word* for prefix search)"
+            },
+            "channel_id": {
+                "type": "string",
+                "description": "Only search this channel"
+            },
+            "server_id": {
+                "type": "string",
+                "description": "Only search this server (guild)"
+            },
+            "author_id": {
+                "type": "string",
+                "description": "Only messages from this user"
+            },
+            "after": {
+                "type": "string",
+                "description": "Only messages sent after this ISO-8601 timestamp"
+            },
+            "before": {
+                "type": "string",
+                "description": "Only messages sent before this ISO-8601 timestamp"
+            },
+            "limit": {
+                "type": "number",
+                "description": "Maximum number of results (default 25)",
+                "minimum": 1,
+                "maximum": 100
+            },
+            "backfill": {
+                "type": "number",
+                "description": "Load up to this many older messages of channel_id into the index before searching",
+                "minimum": 0,
+                "maximum": 10000
+            }
+        },
+        "required": ["query"]
+    }
+), coerce={"channel_id": int, "server_id": int, "author_id": int, "limit": int, "backfill": int}, readonly=True)
+async def search_messages(
+    query: str,
+    channel_id: Optional[int] = None,
+    server_id: Optional[int] = None,
+    author_id: Optional[int] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: int = 25,
+    backfill: int = 0
+) -> List[TextContent]:
+    if message_store is None:
+        raise RuntimeError("Message store is disabled (set MESSAGE_STORE_PATH to enable search)")
+
+    if backfill > 0:
+        if channel_id is None:
+            raise ValueError("backfill requires channel_id")
+        await _backfill_channel(await resolver.channel(channel_id), min(backfill, 10000))
+
+    hits = message_store.search(
+        query,
+        limit=max(1, min(limit, 100)),
+        channel_id=channel_id,
+        guild_id=server_id,
+        author_id=author_id,
+        min_id=_snowflake_bound(after, high=False) if after else None,
+        max_id=_snowflake_bound(before, high=True) if before else None
+    )
+
+    results = []
+    for message_id, hit_channel_id, author, created_at, snippet in hits:
+        channel = discord_client.get_channel(hit_channel_id)
+        channel_name = f"#{channel.name}" if channel is not None and hasattr(channel, "name") else str(hit_channel_id)
+        results.append(f"{author} in {channel_name} ({created_at}) [ID: {message_id}]:\n{snippet}")
+
+    return [TextContent(
+        type="text",
+        text=f"Found {len(results)} messages for '{query}':\n\n" + "\n\n".join(results)
+    )]
+
+@registry.register(Tool(
+    name="get_user_info",
+    description="Get information about a Discord user",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "user_id": {
+                "type": "string",
+                "description": "Discord user ID"
+            }
+        },
+        "required": ["user_id"]
+    }
+), coerce={"user_id": int}, readonly=True)
+async def get_user_info(user_id: int) -> List[TextContent]:
+    user = await resolver.user(user_id)
+    user_info = {
+        "id": str(user.id),
+        "name": user.name,
+        "discriminator": user.discriminator,
+        "bot": user.bot,
+        "created_at": user.created_at.isoformat()
+    }
+    return [TextContent(
+        type="text",
+        text=f"User information:\n" + f"Name: {user_info['name']}#{user_info['discriminator']}\n" + f"ID: {user_info['id']}\n" + f"Bot: {user_info['bot']}\n" + f"Created: {user_info['created_at']}"
+    )]
+
+@registry.register(Tool(
+    name="moderate_message",
+    description="Delete a message and optionally timeout the user",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "channel_id": {
+                "type": "string",
+                "description": "Channel ID containing the message"
+            },
+            "message_id": {
+                "type": "string",
+                "description": "ID of message to moderate"
+            },
+            "reason": {
+                "type": "string",
+                "description": "Reason for moderation"
+            },
+            "timeout_minutes": {
+                "type": "number",
+                "description": "Optional timeout duration in minutes",
+                "minimum": 0,
+                "maximum": 40320  # Max 4 weeks
+            }
+        },
+        "required": ["channel_id", "message_id", "reason"]
+    }
+), coerce={"channel_id": int, "message_id": int})
+async def moderate_message(
+    channel_id: int,
+    message_id: int,
+    reason: str,
+    timeout_minutes: float = 0
+) -> List[TextContent]:
+    message = await resolver.message(channel_id, message_id)
+
+    # Delete the message
+    await rest.request(
+        "DELETE /channels/{channel_id}/messages/{message_id}", channel_id,
+        lambda: message.delete(reason=reason),
+    )
+    resolver.invalidate_message(message.channel.id, message.id)
+
+    # Handle timeout if specified
+    if timeout_minutes > 0:
+        if isinstance(message.author, discord.Member):
+            try:
+                duration = discord.utils.utcnow() + timedelta(
+                    minutes=timeout_minutes
+                )
+                await rest.request(
+                    "PATCH /guilds/{guild_id}/members/{user_id}", message.guild.id,
+                    lambda: message.author.timeout(duration, reason=reason),
+                )
+                return [TextContent(
+                type="text",
+                text=f"Message deleted and user timed out for {timeout_minutes} minutes."
+            )]
+            except discord.Forbidden:
+                return [TextContent(
+                    type="text",
+                    text="Message deleted but lacking permissions to timeout user."
+                )]
+
+    return [TextContent(
+        type="text",
+        text="Message deleted successfully."
+    )]
+
+# Discord löscht per Bulk-Delete nur Nachrichten jünger als 14 Tage (mit Sicherheitsabstand)
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+
+async def _bulk_timeout(authors: List[Any], minutes: float, reason: str) -> tuple:
+    """Setzt Timeouts für mehrere Mitglieder parallel; gibt (Anzahl erfolgreich, IDs fehlgeschlagen) zurück"""
+    duration = discord.utils.utcnow() + timedelta(minutes=minutes)
+    results = await asyncio.gather(
+        *(rest.request(
+            "PATCH /guilds/{guild_id}/members/{user_id}", author.guild.id,
+            lambda author=author: author.timeout(duration, reason=reason), BULK,
+        ) for author in authors),
+        return_exceptions=True
+    )
+    failed = [author.id for author, result in zip(authors, results) if isinstance(result, Exception)]
+    for author, result in zip(authors, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Failed to timeout {author}: {result}")
+    return len(authors) - len(failed), failed
+
+@registry.register(Tool(
+    name="bulk_moderate",
+    description="Delete many messages at once (by ID or filter) and optionally timeout their authors",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "channel_id": {
+                "type": "string",
+                "description": "Channel ID containing the messages"
+            },
+            "message_ids": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "IDs of messages to delete (alternative to the filters)"
+            },
+            "author_id": {
+                "type": "string",
+                "description": "Filter: only messages from this user"
+            },
+            "pattern": {
+                "type": "string",
+                "description": "Filter: regular expression the content must match (case-insensitive)"
+            },
+            "after": {
+                "type": "string",
+                "description": "Filter: only messages sent after this ISO-8601 timestamp"
+            },
+            "before": {
+                "type": "string",
+                "description": "Filter: only messages sent before this ISO-8601 timestamp"
+            },
+            "scan_limit": {
+                "type": "number",
+                "description": "Filter: number of messages to scan (default 500)",
+                "minimum": 1,
+                "maximum": 10000
+            },
+            "reason": {
+                "type": "string",
+                "description": "Reason for moderation"
+            },
+            "timeout_minutes": {
+                "type": "number",
+                "description": "Optional timeout for every distinct author",
+                "minimum": 0,
+                "maximum": 40320  # Max 4 weeks
+            },
+            "dry_run": {
+                "type": "boolean",
+                "description": "Only report what would be deleted"
+            }
+        },
+        "required": ["channel_id", "reason"]
+    }
+), coerce={"channel_id": int, "message_ids": lambda ids: [int(i) for i in ids], "author_id": int, "scan_limit": int})
+async def bulk_moderate(
+    channel_id: int,
+    reason: str,
+    message_ids: Optional[List[int]] = None,
+    author_id: Optional[int] = None,
+    pattern: Optional[str] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    scan_limit: int = 500,
+    timeout_minutes: float = 0,
+    dry_run: bool = False
+) -> List[TextContent]:
+    if not message_ids and author_id is None and pattern is None and after is None:
+        raise ValueError("Provide message_ids or at least one filter (author_id, pattern, after)")
+
+    channel = await resolver.channel(channel_id)
+    # Message-ID -> Autor (None wenn unbekannt)
+    targets: Dict[int, Any] = {}
+
+    if message_ids:
+        for message_id in dict.fromkeys(message_ids):
+            targets[message_id] = None
+        if timeout_minutes > 0:
+            # Autoren werden nur für Timeouts benötigt
+            messages = await asyncio.gather(
+                *(resolver.message(channel_id, message_id) for message_id in targets),
+                return_exceptions=True
+            )
+            for message_id, message in zip(list(targets), messages):
+                if isinstance(message, discord.NotFound):
+                    del targets[message_id]
+                elif not isinstance(message, Exception):
+                    targets[message_id] = message.author
+    else:
+        regex = re.compile(pattern, re.IGNORECASE) if pattern else None
+        history_kwargs = {"limit": min(scan_limit, 10000)}
+        if after:
+            history_kwargs["after"] = discord.Object(id=_snowflake_bound(after, high=False))
+        if before:
+            history_kwargs["before"] = discord.Object(id=_snowflake_bound(before, high=True))
+        async for message in _history(channel, BULK, **history_kwargs):
+            if author_id is not None and message.author.id != author_id:
+                continue
+            if regex is not None and not regex.search(message.content):
+                continue
+            targets[message.id] = message.author
+
+    # Jünger als 14 Tage -> Bulk-Delete (100 pro Request), ältere einzeln
+    cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+    recent = [i for i in targets if discord.utils.snowflake_time(i) > cutoff]
+    old = [i for i in targets if discord.utils.snowflake_time(i) <= cutoff]
+    authors = list({
+        author.id: author for author in targets.values() if isinstance(author, discord.Member)
+    }.values())
+    # Autoren, die den Server verlassen haben (discord.User), lassen sich nicht timeouten
+    member_ids = {author.id for author in authors}
+    non_members = list(dict.fromkeys(
+        author.id for author in targets.values() if author is not None and author.id not in member_ids
+    ))
+
+    if dry_run:
         return [TextContent(
             type="text",
-            text=f"Removed reaction {arguments['emoji']} from message"
+            text=f"Dry run: {len(targets)} messages match ({len(recent)} bulk, {len(old)} individual), "
+                 f"{len(authors) + len(non_members)} distinct authors ({len(non_members)} not members).\n"
+                 "Message IDs: " + ", ".join(str(i) for i in targets)
         )]
 
-    elif name == "get_user_roles":
-        user_roles = []
-        user_id = int(arguments["user_id"])
-        
-        for guild in discord_client.guilds:
-            member = guild.get_member(user_id)
-            if member:
-                roles = [
-                    {
-                        "server": guild.name,
-                        "server_id": str(guild.id),
-                        "role": role.name,
-                        "role_id": str(role.id)
-                    }
-                    for role in member.roles 
-                    if role.name != "@everyone"
-                ]
-                user_roles.extend(roles)
-        
-        return [TextContent(
-            type="text",
-            text=f"User Roles:\n" + "\n".join(
-                f"Server {r['server']}: {r['role']} (ID: {r['role_id']})" 
-                for r in user_roles
+    bulk_deleted = 0
+    single_deleted = 0
+    failed = 0
+    for start in range(0, len(recent), 100):
+        chunk = recent[start:start + 100]
+        try:
+            await rest.request(
+                "POST /channels/{channel_id}/messages/bulk-delete", channel_id,
+                lambda: channel.delete_messages([discord.Object(id=i) for i in chunk], reason=reason), BULK,
             )
-        )]
+            bulk_deleted += len(chunk)
+        except discord.HTTPException as e:
+            logger.warning(f"Bulk delete failed, falling back to single deletes: {e}")
+            old.extend(chunk)
+
+    # Einzelne Deletes nacheinander im Bucket der Route
+    for message_id in old:
+        try:
+            await rest.request(
+                "DELETE /channels/{channel_id}/messages/{message_id}", channel_id,
+                channel.get_partial_message(message_id).delete, BULK,
+            )
+            single_deleted += 1
+        except discord.NotFound:
+            pass
+        except discord.HTTPException as e:
+            logger.warning(f"Failed to delete message {message_id}: {e}")
+            failed += 1
+
+    for message_id in targets:
+        resolver.invalidate_message(channel_id, message_id)
+
+    summary = (
+        f"Bulk moderation: {len(targets)} messages matched, "
+        f"{bulk_deleted + single_deleted} deleted ({bulk_deleted} bulk, {single_deleted} individually), "
+        f"{failed} failed."
+    )
+    if timeout_minutes > 0 and (authors or non_members):
+        timed_out, timeout_failed = await _bulk_timeout(authors, timeout_minutes, reason) if authors else (0, [])
+        summary += f"\nTimed out {timed_out} of {len(authors) + len(non_members)} authors for {timeout_minutes} minutes."
+        if timeout_failed:
+            summary += "\nTimeout failed: " + ", ".join(str(i) for i in timeout_failed)
+        if non_members:
+            summary += "\nNot a member (skipped): " + ", ".join(str(i) for i in non_members)
+
+    return [TextContent(type="text", text=summary)]
+
+# Diagnose Tools
+@registry.register(Tool(
+    name="get_cache_stats",
+    description="Get hit/miss counters of the entity cache",
+    inputSchema={
+        "type": "object",
+        "properties": {}
+    }
+), readonly=True)
+async def get_cache_stats() -> List[TextContent]:
+    report = resolver.report()
+    sizes = report.pop("sizes")
+    return [TextContent(
+        type="text",
+        text="Entity Cache:\n" + "\n".join(f"{k}: {v}" for k, v in report.items())
+            + "\nCached: " + ", ".join(f"{k}={v}" for k, v in sizes.items())
+    )]
+
+@registry.register(Tool(
+    name="get_rest_stats",
+    description="Get queue depth, wait times and rate-limit counters of the REST scheduler",
+    inputSchema={
+        "type": "object",
+        "properties": {}
+    }
+), readonly=True)
+async def get_rest_stats() -> List[TextContent]:
+    report = rest.report()
+    routes = report.pop("routes")
+    lines = [f"{k}: {v}" for k, v in report.items()]
+    for route, stats in sorted(routes.items()):
+        lines.append(f"{route}: " + ", ".join(f"{k}={v}" for k, v in stats.items()))
+    return [TextContent(type="text", text="REST Scheduler:\n" + "\n".join(lines))]
+
+@registry.register(Tool(
+    name="get_memory_report",
+    description="Show cached members, messages and channels per server for sizing the bot's memory",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "limit": {
+                "type": "number",
+                "description": "Number of servers to list, largest member cache first (default: 25)",
+                "minimum": 1
+            }
+        }
+    }
+), coerce={"limit": int}, readonly=True)
+async def get_memory_report(limit: int = 25) -> List[TextContent]:
+    messages_per_guild: Dict[int, int] = {}
+    for message in bot.cached_messages:
+        if message.guild is not None:
+            messages_per_guild[message.guild.id] = messages_per_guild.get(message.guild.id, 0) + 1
+
+    guilds = sorted(bot.guilds, key=lambda guild: len(guild.members), reverse=True)
+    lines = [
+        f"Guilds: {len(bot.guilds)}",
+        f"Cached users: {len(bot.users)}",
+        f"Cached members: {sum(len(guild.members) for guild in bot.guilds)}",
+        f"Cached messages: {len(bot.cached_messages)} (max: {MAX_MESSAGES})",
+        f"Chunk at startup: {CHUNK_GUILDS_AT_STARTUP}, member cache: {bot._connection.member_cache_flags!r}",
+        "Member index: " + ", ".join(f"{k}={v}" for k, v in member_index.report().items()),
+        "Welcomed users: " + ", ".join(f"{k}={v}" for k, v in welcomed_users.report().items()),
+    ]
+    if message_store is not None:
+        lines.append(f"Message store rows: {message_store.count()}")
+    try:
+        import resource
+        # ru_maxrss ist unter Linux in KiB
+        lines.append(f"Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024} MiB")
+    except ImportError:
+        pass
+
+    lines.append("")
+    for guild in guilds[:limit]:
+        lines.append(
+            f"{guild.name} (ID: {guild.id}): members {len(guild.members)}/{guild.member_count}"
+            f"{' (chunked)' if guild.chunked else ''}, messages {messages_per_guild.get(guild.id, 0)}, "
+            f"channels {len(guild.channels)}, threads {len(guild.threads)}, roles {len(guild.roles)}"
+        )
+    if len(guilds) > limit:
+        lines.append(f"... and {len(guilds) - limit} more servers")
 
-    raise ValueError(f"Unknown tool: {name}")
+    return [TextContent(type="text", text="Memory Report:\n" + "\n".join(lines))]
+
+@registry.register(Tool(
+    name="get_server_metrics",
+    description="Get per-tool call counts, latency percentiles, REST calls and payload sizes",
+    inputSchema={
+        "type": "object",
+        "properties": {}
+    }
+), readonly=True)
+async def get_server_metrics() -> List[TextContent]:
+    lines = [
+        f"Tool calls in flight: {metrics.inflight}",
+        f"MCP commands in flight: {app.inflight}",
+        f"REST queue depth: {rest.report()['queue_depth']}",
+        f"Gateway latency: {_format_latency(bot.latency)}",
+    ]
+    if isinstance(bot, commands.AutoShardedBot):
+        lines.extend(f"Shard {shard_id} latency: {_format_latency(latency)}" for shard_id, latency in _shard_latencies())
+    lines.extend(f"{phase}: {seconds:.2f}s" for phase, seconds in STARTUP_METRICS.items())
+    lines.append("")
+    for tool, stats in metrics.summary().items():
+        lines.append(f"{tool}: " + ", ".join(f"{k}={v}" for k, v in stats.items()))
+    return [TextContent(type="text", text="Server Metrics:\n" + "\n".join(lines))]
+
+# User Role Tools
+@registry.register(Tool(
+    name="get_user_roles",
+    description="Get all roles of a user across all mutual servers",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "user_id": {
+                "type": "string",
+                "description": "Discord user ID"
+            }
+        },
+        "required": ["user_id"]
+    }
+), coerce={"user_id": int}, readonly=True)
+async def get_user_roles(user_id: int) -> List[TextContent]:
+    user_roles = []
+
+    # Nur die gemeinsamen Server laut Mitglieder-Index statt aller Server
+    for guild, member in _mutual_members(user_id):
+        if member:
+            roles = [
+                {
+                    "server": guild.name,
+                    "server_id": str(guild.id),
+                    "role": role.name,
+                    "role_id": str(role.id)
+                }
+                for role in member.roles
+                if role.name != "@everyone"
+            ]
+            user_roles.extend(roles)
+
+    return [TextContent(
+        type="text",
+        text=f"User Roles:\n" + "\n".join(
+            f"Server {r['server']}: {r['role']} (ID: {r['role_id']})"
+            for r in user_roles
+        )
+    )]
+
+@registry.register(Tool(
+    name="get_members_with_role",
+    description="List the members of a server that have a given role",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "server_id": {
+                "type": "string",
+                "description": "Discord server ID"
+            },
+            "role_id": {
+                "type": "string",
+                "description": "Role ID"
+            },
+            "limit": {
+                "type": "number",
+                "description": "Maximum number of members to list (default: 100)",
+                "minimum": 1,
+                "maximum": 1000
+            }
+        },
+        "required": ["server_id", "role_id"]
+    }
+), coerce={"server_id": int, "role_id": int, "limit": int}, readonly=True)
+async def get_members_with_role(server_id: int, role_id: int, limit: int = 100) -> List[TextContent]:
+    guild = await resolver.guild(server_id)
+    await _ensure_chunked(guild)
+    role = guild.get_role(role_id)
+    if role is None:
+        raise ValueError(f"Unknown role: {role_id}")
+
+    if guild.chunked:
+        user_ids = member_index.members_with_role(role_id)
+    else:
+        # Ohne Chunking ist der Index unvollständig; role.members durchsucht den aktuellen Member-Cache
+        user_ids = frozenset(member.id for member in role.members)
+    members = []
+    for user_id in sorted(user_ids)[:min(limit, 1000)]:
+        member = guild.get_member(user_id)
+        if member is not None:
+            members.append(f"{member.name} (ID: {member.id})")
+
+    return [TextContent(
+        type="text",
+        text=f"Members with role {role.name} ({len(user_ids)}):\n" + "\n".join(members)
+    )]
+
+@registry.register(Tool(
+    name="subscribe",
+    description=(
+        "Subscribe to Discord gateway events. Matching events are pushed as notifications "
+        "({\"type\": \"notification\", \"subscription\", \"event\", \"data\"}) instead of polling"
+    ),
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "events": {
+                "type": "array",
+                "items": {"type": "string", "enum": list(EVENTS)},
+                "description": "Event types to receive (default: message)"
+            },
+            "guild_ids": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Only events from these servers"
+            },
+            "channel_ids": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Only events from these channels"
+            },
+            "author_ids": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Only events caused by these users (author, reacting user or member)"
+            },
+            "max_queue": {
+                "type": "number",
+                "description": "Events buffered for a slow client before the policy applies (default: 100)",
+                "minimum": 1,
+                "maximum": 10000
+            },
+            "policy": {
+                "type": "string",
+                "enum": list(POLICIES),
+                "description": "drop_oldest, drop_newest, or coalesce repeated events for the same object (default: drop_oldest)"
+            }
+        }
+    }
+), coerce={
+    "guild_ids": lambda ids: [int(i) for i in ids],
+    "channel_ids": lambda ids: [int(i) for i in ids],
+    "author_ids": lambda ids: [int(i) for i in ids],
+    "max_queue": int,
+})
+async def subscribe(
+    events: Optional[List[str]] = None,
+    guild_ids: Optional[List[int]] = None,
+    channel_ids: Optional[List[int]] = None,
+    author_ids: Optional[List[int]] = None,
+    max_queue: int = 100,
+    policy: str = "drop_oldest",
+) -> List[TextContent]:
+    subscription = subscriptions.subscribe(
+        events or ["message"], guild_ids, channel_ids, author_ids, min(max_queue, 10000), policy
+    )
+    return [TextContent(
+        type="text",
+        text=f"Subscribed {subscription.id} to {', '.join(sorted(subscription.events))} (policy: {policy})"
+    )]
+
+@registry.register(Tool(
+    name="unsubscribe",
+    description="Cancel a subscription created with subscribe",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "subscription_id": {
+                "type": "string",
+                "description": "ID returned by subscribe"
+            }
+        },
+        "required": ["subscription_id"]
+    }
+))
+async def unsubscribe(subscription_id: str) -> List[TextContent]:
+    subscription = subscriptions.unsubscribe(subscription_id)
+    return [TextContent(
+        type="text",
+        text=f"Unsubscribed {subscription.id}: delivered {subscription.delivered}, dropped {subscription.dropped}"
+    )]
+
+@registry.register(Tool(
+    name="list_subscriptions",
+    description="List active subscriptions with their filters and queue counters",
+    inputSchema={
+        "type": "object",
+        "properties": {}
+    }
+), readonly=True)
+async def list_subscriptions() -> List[TextContent]:
+    report = subscriptions.report()
+    if not report:
+        return [TextContent(type="text", text="No active subscriptions")]
+    return [TextContent(
+        type="text",
+        text="Subscriptions:\n" + "\n".join(
+            f"{subscription_id}: " + ", ".join(f"{k}={v}" for k, v in stats.items())
+            for subscription_id, stats in report.items()
+        )
+    )]
+
+@app.list_tools()
+async def list_tools() -> ToolCatalog:
+    """List available Discord tools."""
+    return registry.catalog
+
+@app.readonly_tool()
+def is_readonly_tool(name: str) -> bool:
+    return registry.is_readonly(name)
+
+@app.call_tool()
+@require_discord_client
+async def call_tool(name: str, arguments: Any) -> List[TextContent]:
+    """Handle Discord tool calls."""
+    # Unbekannte Namen zusammenfassen, damit die Metrik-Labels begrenzt bleiben
+    label = name if name in registry else "unknown"
+    async with metrics.track(label, _current_frame_size.get()) as call:
+        result = await registry.call(name, arguments)
+        call.response_bytes = sum(len(item.text.encode('utf-8')) for item in result)
+        return result
 
 class GracefulExitEvent:
-    """Event für sauberes Beenden unter Windows"""
+    """Exit-Event, das aus Signal-Handlern und anderen Threads (Windows-Konsole) gesetzt werden kann"""
     def __init__(self):
-        self._event = threading.Event()
+        self._event = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._requested = False
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """Verknüpft das Event mit der laufenden Event-Loop"""
+        self._loop = loop
+        if self._requested:
+            self._event.set()
 
     def set(self):
-        self._event.set()
+        self._requested = True
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._event.set()
+        else:
+            # Aufruf aus einem anderen Thread: die Loop weckt sich selbst auf
+            loop.call_soon_threadsafe(self._event.set)
+
+    def is_set(self) -> bool:
+        return self._requested
 
     async def wait(self):
-        # Konvertiere Threading-Event in asyncio-Event
-        while not self._event.is_set():
-            await asyncio.sleep(0.1)
+        await self._event.wait()
         return True
 
 def win32_handler(ctrl_type):
@@ -910,77 +2839,100 @@ def win32_handler(ctrl_type):
 
 # Globales Exit-Event
 EXIT_EVENT = GracefulExitEvent()
+# Obergrenze für die gesamte Shutdown-Sequenz in Sekunden
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "10"))
+# Referenz auf den Windows-Konsolen-Handler, sonst räumt der GC den Callback weg
+_win32_handler_ref = None
+# HTTP-Server für /metrics (nur mit METRICS_PORT)
+metrics_server: Optional[asyncio.AbstractServer] = None
+# Hintergrund-Task, der den Nachrichtenspeicher schreibt (nur mit MESSAGE_STORE_PATH)
+message_store_task: Optional[asyncio.Task] = None
 
-async def cleanup():
+async def cleanup(deadline: Optional[float] = None):
     """Cleanup function to properly close connections"""
-    if discord_client:
+    loop = asyncio.get_running_loop()
+    deadline = deadline or loop.time() + SHUTDOWN_TIMEOUT
+
+    if metrics_server is not None:
+        metrics_server.close()
+    subscriptions.close()
+
+    if discord_client and not discord_client.is_closed():
         try:
-            logger.info("Starting cleanup...")
-            
-            # Disconnect from Discord
-            if not discord_client.is_closed():
-                # Stoppe zuerst den Heartbeat falls vorhanden
-                if hasattr(discord_client.ws, '_keep_alive'):
-                    try:
-                        discord_client.ws._keep_alive.stop()
-                        await asyncio.sleep(0.5)
-                    except:
-                        pass
-                
-                try:
-                    await discord_client.close()
-                    logger.info("Discord client closed")
-                except:
-                    pass
-                
+            logger.info("Closing Discord connection...")
+            await asyncio.wait_for(discord_client.close(), max(0.1, deadline - loop.time()))
+            logger.info("Discord client closed")
+        except asyncio.TimeoutError:
+            logger.warning("Discord client did not close before the shutdown deadline")
         except Exception as e:
             logger.error(f"Error during Discord client cleanup: {e}", exc_info=True)
 
+    # Persistente Caches schreiben; der Schreib-Task darf danach nicht mehr auf die Verbindung zugreifen
+    if message_store_task is not None:
+        message_store_task.cancel()
+        try:
+            await message_store_task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Message store task failed: {e}", exc_info=True)
+    if message_store is not None:
+        message_store.close()
+    welcomed_users.close()
+
 def handle_exit():
     """Handle synchronous cleanup on process termination"""
-    logger.info("Process termination detected, running cleanup...")
     if discord_client and not discord_client.is_closed():
+        logger.info("Process termination detected, running cleanup...")
         try:
-            if hasattr(discord_client.ws, '_keep_alive'):
-                discord_client.ws._keep_alive.stop()
             loop = asyncio.new_event_loop()
-            loop.run_until_complete(discord_client.close())
+            loop.run_until_complete(asyncio.wait_for(discord_client.close(), SHUTDOWN_TIMEOUT))
             loop.close()
         except:
             pass
-    logger.info("Emergency cleanup complete")
+        logger.info("Emergency cleanup complete")
 
 async def main():
     """Main entry point with proper cleanup"""
+    global _win32_handler_ref, metrics_server, message_store_task
     if not DISCORD_TOKEN:
         logger.error("DISCORD_TOKEN environment variable is not set")
         return 1
-    
-    # Registriere Windows Event Handler
+
+    loop = asyncio.get_running_loop()
+    EXIT_EVENT.bind(loop)
+
+    # Signale direkt in der Event-Loop behandeln
     if sys.platform == 'win32':
-        kernel32 = ctypes.windll.kernel32
-        kernel32.SetConsoleCtrlHandler(ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_ulong)(win32_handler), True)
+        _win32_handler_ref = ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_ulong)(win32_handler)
+        ctypes.windll.kernel32.SetConsoleCtrlHandler(_win32_handler_ref, True)
+    else:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, EXIT_EVENT.set)
     
     # Registriere Notfall-Cleanup
     atexit.register(handle_exit)
     
+    shutdown_started = None
+    deadline = None
     try:
+        if METRICS_PORT:
+            try:
+                metrics_server = await metrics.serve(METRICS_HOST, METRICS_PORT)
+            except OSError as e:
+                logger.error(f"Could not start metrics endpoint: {e}")
+
+        if message_store is not None:
+            message_store_task = asyncio.create_task(message_store.run(
+                MESSAGE_STORE_FLUSH_INTERVAL, MESSAGE_STORE_MAX_AGE_DAYS, MESSAGE_STORE_MAX_ROWS
+            ))
+
         # Start Discord bot
         bot_task = asyncio.create_task(bot.start(DISCORD_TOKEN))
-        logger.info("Starting Discord bot...")
-        
-        # Wait for bot to be ready
-        timeout = 30
-        start_time = asyncio.get_event_loop().time()
-        while not discord_client:
-            if asyncio.get_event_loop().time() - start_time > timeout:
-                raise TimeoutError("Discord bot failed to start within timeout period")
-            await asyncio.sleep(0.1)
-        
-        logger.info("Bot is ready, starting MCP server...")
+        logger.info("Starting Discord bot and MCP server...")
         
         try:    
-            # Run MCP server
+            # MCP-Server sofort starten; Tool-Aufrufe warten auf bot_ready
             async with stdio_server() as (read_stream, write_stream):
                 server_task = asyncio.create_task(
                     app.run(
@@ -989,29 +2941,41 @@ async def main():
                         app.create_initialization_options()
                     )
                 )
+                STARTUP_METRICS["transport_ready_seconds"] = time.perf_counter() - _PROCESS_START
                 
-                # Warte auf Server-Task oder Exit-Event
+                # Warte auf Server-Task, Bot-Task (z.B. Login fehlgeschlagen) oder Exit-Event
+                exit_task = asyncio.create_task(EXIT_EVENT.wait())
                 await asyncio.wait(
-                    [server_task, EXIT_EVENT.wait()],
+                    [server_task, bot_task, exit_task],
                     return_when=asyncio.FIRST_COMPLETED
                 )
+                if bot_task.done() and not bot_task.cancelled() and bot_task.exception():
+                    logger.error(f"Discord bot stopped: {bot_task.exception()}")
                 
                 logger.info("Starting shutdown sequence...")
+                shutdown_started = time.perf_counter()
+                deadline = loop.time() + SHUTDOWN_TIMEOUT
+                # Keine neuen Befehle, laufende abschließen, Antworten flushen
+                app.drain_timeout = min(app.drain_timeout, SHUTDOWN_TIMEOUT / 2)
+                subscriptions.close()
+                await app.shutdown()
                 
         except Exception as e:
             logger.error(f"Error in server task: {e}", exc_info=True)
         finally:
+            if deadline is None:
+                shutdown_started = time.perf_counter()
+                deadline = loop.time() + SHUTDOWN_TIMEOUT
             # Cleanup
-            await cleanup()
+            await cleanup(deadline)
             
-            # Cancel remaining tasks
-            for task in asyncio.all_tasks():
-                if task is not asyncio.current_task():
-                    task.cancel()
-                    try:
-                        await task
-                    except asyncio.CancelledError:
-                        pass
+            # Verbliebene Tasks gemeinsam abbrechen statt nacheinander
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.wait(tasks, timeout=max(0.1, deadline - loop.time()))
+            logger.info(f"Shutdown took {time.perf_counter() - shutdown_started:.2f}s")
                     
     except Exception as e:
         logger.error(f"Error in main loop: {e}", exc_info=True)
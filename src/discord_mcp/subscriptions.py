@@ -0,0 +1,199 @@
+"""Abonnements für Gateway-Events, die als Notifications an den MCP-Client gepusht werden"""
+import asyncio
+import itertools
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional
+
+logger = logging.getLogger("discord-mcp-server")
+
+EVENTS = (
+    "message",
+    "message_edit",
+    "message_delete",
+    "reaction_add",
+    "reaction_remove",
+    "member_join",
+    "member_remove",
+)
+# drop_oldest: ältestes wartendes Event verwerfen, drop_newest: neues Event verwerfen,
+# coalesce: Events zum selben Objekt (z.B. mehrere Edits einer Nachricht) ersetzen das wartende
+POLICIES = ("drop_oldest", "drop_newest", "coalesce")
+
+
+class Subscription:
+    """Filter und begrenzte Queue eines Abonnements"""
+    def __init__(
+        self,
+        subscription_id: str,
+        events: FrozenSet[str],
+        guild_ids: Optional[FrozenSet[int]],
+        channel_ids: Optional[FrozenSet[int]],
+        author_ids: Optional[FrozenSet[int]],
+        max_queue: int,
+        policy: str,
+    ):
+        self.id = subscription_id
+        self.events = events
+        self.guild_ids = guild_ids
+        self.channel_ids = channel_ids
+        self.author_ids = author_ids
+        self.max_queue = max_queue
+        self.policy = policy
+        self._pending: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._ready = asyncio.Event()
+        self._seq = itertools.count()
+        self.task: Optional[asyncio.Task] = None
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        # Seit der letzten zugestellten Notification verworfene Events
+        self._dropped_unreported = 0
+
+    def matches(self, guild_id: Optional[int], channel_id: Optional[int], author_id: Optional[int]) -> bool:
+        return (
+            (self.guild_ids is None or guild_id in self.guild_ids)
+            and (self.channel_ids is None or channel_id in self.channel_ids)
+            and (self.author_ids is None or author_id in self.author_ids)
+        )
+
+    def offer(self, event: Dict[str, Any], key: Optional[Hashable]) -> None:
+        """Reiht ein Event ein und wendet bei voller Queue die Policy an"""
+        if self.policy == "coalesce" and key is not None and key in self._pending:
+            self._pending[key] = event
+            self.coalesced += 1
+            return
+        if len(self._pending) >= self.max_queue:
+            self.dropped += 1
+            self._dropped_unreported += 1
+            if self.policy == "drop_newest":
+                return
+            self._pending.popitem(last=False)
+        if self.policy != "coalesce" or key is None:
+            key = ("seq", next(self._seq))
+        self._pending[key] = event
+        self._ready.set()
+
+    async def pump(self, send: Callable[[Dict[str, Any]], Awaitable[bool]]) -> None:
+        """Stellt wartende Events nacheinander zu; ein langsamer Client füllt nur diese Queue"""
+        while True:
+            await self._ready.wait()
+            while self._pending:
+                _, event = self._pending.popitem(last=False)
+                notification = {"subscription": self.id, **event}
+                if self._dropped_unreported:
+                    notification["dropped"] = self._dropped_unreported
+                    self._dropped_unreported = 0
+                if await send(notification):
+                    self.delivered += 1
+                else:
+                    self.dropped += 1
+            self._ready.clear()
+
+    def report(self) -> Dict[str, Any]:
+        filters = {
+            name: sorted(ids)
+            for name, ids in (("guilds", self.guild_ids), ("channels", self.channel_ids), ("authors", self.author_ids))
+            if ids is not None
+        }
+        return {
+            "events": sorted(self.events),
+            **filters,
+            "policy": self.policy,
+            "queued": len(self._pending),
+            "max_queue": self.max_queue,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+
+class SubscriptionHub:
+    """Verteilt Gateway-Events an passende Abonnements.
+
+    publish() ist synchron und kostet ohne Abonnenten für den Event-Typ nur einen Dict-Lookup.
+    """
+    def __init__(self, send: Callable[[Dict[str, Any]], Awaitable[bool]], max_subscriptions: int = 32):
+        self._send = send
+        self.max_subscriptions = max_subscriptions
+        self._subscriptions: Dict[str, Subscription] = {}
+        self._by_event: Dict[str, List[Subscription]] = {}
+        self._ids = itertools.count(1)
+
+    def wants(self, event_type: str) -> bool:
+        return event_type in self._by_event
+
+    def subscribe(
+        self,
+        events: Iterable[str],
+        guild_ids: Optional[Iterable[int]] = None,
+        channel_ids: Optional[Iterable[int]] = None,
+        author_ids: Optional[Iterable[int]] = None,
+        max_queue: int = 100,
+        policy: str = "drop_oldest",
+    ) -> Subscription:
+        events = frozenset(events)
+        unknown = events - set(EVENTS)
+        if not events or unknown:
+            raise ValueError(f"Unknown event type(s): {', '.join(sorted(unknown)) or 'none given'}")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy: {policy}")
+        if len(self._subscriptions) >= self.max_subscriptions:
+            raise ValueError(f"Too many subscriptions (max: {self.max_subscriptions})")
+
+        subscription = Subscription(
+            f"sub-{next(self._ids)}",
+            events,
+            frozenset(guild_ids) if guild_ids is not None else None,
+            frozenset(channel_ids) if channel_ids is not None else None,
+            frozenset(author_ids) if author_ids is not None else None,
+            max(1, max_queue),
+            policy,
+        )
+        subscription.task = asyncio.create_task(subscription.pump(self._send))
+        self._subscriptions[subscription.id] = subscription
+        for event in events:
+            self._by_event.setdefault(event, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription_id: str) -> Subscription:
+        subscription = self._subscriptions.pop(subscription_id, None)
+        if subscription is None:
+            raise ValueError(f"Unknown subscription: {subscription_id}")
+        for event in subscription.events:
+            subscribers = self._by_event[event]
+            subscribers.remove(subscription)
+            if not subscribers:
+                del self._by_event[event]
+        if subscription.task is not None:
+            subscription.task.cancel()
+        return subscription
+
+    def publish(
+        self,
+        event_type: str,
+        data: Dict[str, Any],
+        guild_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
+        author_id: Optional[int] = None,
+        key: Optional[Hashable] = None,
+    ) -> int:
+        """Reiht das Event bei allen passenden Abonnements ein; Anzahl der Empfänger"""
+        subscribers = self._by_event.get(event_type)
+        if not subscribers:
+            return 0
+        event = {"event": event_type, "data": data}
+        count = 0
+        for subscription in subscribers:
+            if subscription.matches(guild_id, channel_id, author_id):
+                subscription.offer(event, key)
+                count += 1
+        return count
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        return {subscription_id: sub.report() for subscription_id, sub in self._subscriptions.items()}
+
+    def close(self) -> None:
+        """Beendet alle Abonnements (beim Herunterfahren)"""
+        for subscription_id in list(self._subscriptions):
+            self.unsubscribe(subscription_id)
@@ -1,11 +1,83 @@
+import logging
 import os
+import time
 from pathlib import Path
-from typing import Dict, Any
+from string import Formatter
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("discord-mcp-server")
+
+_formatter = Formatter()
+
+# Ein Schritt im Render-Plan: (Literal, Feldname, Format-Spec, Konvertierung)
+_Segment = Tuple[str, Optional[str], str, Optional[str]]
+
+
+class CompiledTemplate:
+    """Einmal geparstes Template: Literale und Feld-Slots statt str.format pro Aufruf"""
+    __slots__ = ("source", "segments", "static", "_printf", "_simple")
+
+    def __init__(self, source: str):
+        self.source = source
+        segments = []
+        for literal, field_name, format_spec, conversion in _formatter.parse(source):
+            if field_name is not None and (not field_name or field_name[0].isdigit()):
+                raise ValueError(f"Nur benannte Platzhalter erlaubt: {source[:40]!r}")
+            if field_name is not None and format_spec and "{" in format_spec:
+                raise ValueError(f"Verschachtelte Platzhalter werden nicht unterstützt: {field_name}")
+            segments.append((literal, field_name, format_spec or "", conversion))
+        self.segments: Tuple[_Segment, ...] = tuple(segments)
+        # Ohne Platzhalter ist das Ergebnis immer gleich und wird direkt zurückgegeben
+        self.static: Optional[str] = None
+        if all(field_name is None for _, field_name, _, _ in self.segments):
+            self.static = "".join(literal for literal, _, _, _ in self.segments)
+        # Einfache Platzhalter ({name} ohne Spec/Konvertierung/Attributzugriff) brauchen nur str()
+        self._simple = tuple(
+            field_name is not None and not format_spec and conversion is None and field_name.isidentifier()
+            for _, field_name, format_spec, conversion in self.segments
+        )
+        # Bestehen alle Slots aus einfachen Platzhaltern, wird der Plan als %-Format gerendert
+        # (läuft komplett in C, ohne das Template bei jedem Aufruf neu zu parsen)
+        self._printf: Optional[str] = None
+        if self.static is None and all(
+            simple or field_name is None for (_, field_name, _, _), simple in zip(self.segments, self._simple)
+        ):
+            self._printf = "".join(
+                literal.replace("%", "%%") + (f"%({field_name})s" if field_name is not None else "")
+                for literal, field_name, _, _ in self.segments
+            )
+
+    def render(self, kwargs: Dict[str, Any]) -> str:
+        if self.static is not None:
+            return self.static
+        if self._printf is not None:
+            return self._printf % kwargs
+        parts = []
+        for (literal, field_name, format_spec, conversion), simple in zip(self.segments, self._simple):
+            if literal:
+                parts.append(literal)
+            if field_name is None:
+                continue
+            if simple:
+                parts.append(str(kwargs[field_name]))
+                continue
+            value, _ = _formatter.get_field(field_name, (), kwargs)
+            value = _formatter.convert_field(value, conversion)
+            parts.append(format(value, format_spec))
+        return "".join(parts)
+
 
 class TemplateManager:
-    def __init__(self):
-        self.templates: Dict[str, str] = {}
-        self.template_dir = Path(__file__).parent.parent.parent / "templates" / "messages"
+    def __init__(self, template_dir: Optional[Path] = None, reload_interval: Optional[float] = None):
+        self.templates: Dict[str, CompiledTemplate] = {}
+        self.template_dir = template_dir or Path(__file__).parent.parent.parent / "templates" / "messages"
+        if reload_interval is None:
+            # Sekunden zwischen zwei mtime-Prüfungen (0 = kein Hot-Reload); erst hier gelesen, damit .env schon geladen ist
+            reload_interval = float(os.getenv("TEMPLATE_RELOAD_INTERVAL") or 2)
+        self.reload_interval = reload_interval
+        self._mtimes: Dict[Path, int] = {}
+        self._dir_mtime = 0
+        self._next_check = 0.0
         self.load_templates()
 
     def load_templates(self) -> None:
@@ -17,17 +89,65 @@ class TemplateManager:
             )
 
         # Lade alle .md Templates
+        self._dir_mtime = self.template_dir.stat().st_mtime_ns
         for template_file in self.template_dir.glob("*.md"):
-            template_name = template_file.stem
-            self.templates[template_name] = template_file.read_text(encoding='utf-8').strip()
+            self._load(template_file)
+        self._schedule_check()
+
+    def _load(self, template_file: Path) -> None:
+        # mtime vorab merken, damit eine fehlerhafte Datei erst nach der nächsten Änderung erneut geladen wird
+        self._mtimes[template_file] = template_file.stat().st_mtime_ns
+        self.templates[template_file.stem] = CompiledTemplate(template_file.read_text(encoding='utf-8').strip())
+
+    def _schedule_check(self) -> None:
+        self._next_check = time.monotonic() + self.reload_interval
+
+    def reload_changed(self) -> None:
+        """Lädt nur neue, geänderte oder gelöschte Templates nach (per mtime)"""
+        try:
+            dir_mtime = self.template_dir.stat().st_mtime_ns
+        except OSError as e:
+            logger.warning(f"Template-Verzeichnis nicht lesbar, behalte geladene Templates: {e}")
+            return
+        if dir_mtime != self._dir_mtime:
+            # Dateien wurden angelegt, gelöscht oder umbenannt (auch atomares Speichern durch Editoren)
+            self._dir_mtime = dir_mtime
+            files = set(self.template_dir.glob("*.md"))
+            for removed in set(self._mtimes) - files:
+                del self._mtimes[removed]
+                self.templates.pop(removed.stem, None)
+                logger.info(f"Template entfernt: {removed.stem}")
+        else:
+            files = set(self._mtimes)
+
+        for template_file in files:
+            try:
+                if template_file.stat().st_mtime_ns == self._mtimes.get(template_file):
+                    continue
+                self._load(template_file)
+                logger.info(f"Template neu geladen: {template_file.stem}")
+            except (OSError, ValueError) as e:
+                # Fehlerhafte Änderung: das zuletzt gültige Template bleibt aktiv
+                logger.warning(f"Template {template_file.stem} konnte nicht geladen werden: {e}")
 
     def get(self, key: str, **kwargs) -> str:
         """Hole und formatiere ein Template"""
-        if key not in self.templates:
+        if self.reload_interval > 0 and time.monotonic() >= self._next_check:
+            self._schedule_check()
+            self.reload_changed()
+
+        template = self.templates.get(key)
+        if template is None:
             raise KeyError(f"Template nicht gefunden: {key}")
-            
-        template = self.templates[key]
-        return template.format(**kwargs)
+        return template.render(kwargs)
+
+
+_templates: Optional[TemplateManager] = None
+
 
-# Globale Template-Instanz
-templates = TemplateManager()
+def get_templates() -> TemplateManager:
+    """Gemeinsame Template-Instanz, wird beim ersten Zugriff geladen"""
+    global _templates
+    if _templates is None:
+        _templates = TemplateManager()
+    return _templates
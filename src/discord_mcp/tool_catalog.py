@@ -0,0 +1,57 @@
+"""Einmal aufgebauter Tool-Katalog mit vorserialisiertem JSON"""
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Tuple
+
+from .codec import get_codec
+
+
+class ToolCatalog:
+    """Hält die Tool-Definitionen und deren JSON-Bytes.
+
+    Die Bytes werden nur neu erzeugt, wenn ein Tool registriert oder entfernt wird.
+    """
+    def __init__(self, tools: Iterable[Any] = (), codec: Any = None):
+        self._codec = codec or get_codec()
+        self._tools: Dict[str, Any] = {}
+        self._frozen: Tuple[Any, ...] = ()
+        self._payload: Optional[bytes] = None
+        for tool in tools:
+            self.register(tool)
+
+    def register(self, tool: Any) -> None:
+        """Registriert ein Tool (ersetzt ein gleichnamiges)"""
+        self._tools[tool.name] = tool
+        self._invalidate()
+
+    def remove(self, name: str) -> None:
+        """Entfernt ein Tool aus dem Katalog"""
+        del self._tools[name]
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        self._frozen = tuple(self._tools.values())
+        self._payload = None
+
+    @property
+    def tools(self) -> Tuple[Any, ...]:
+        return self._frozen
+
+    @property
+    def by_name(self) -> Mapping[str, Any]:
+        return MappingProxyType(self._tools)
+
+    @property
+    def payload(self) -> bytes:
+        """JSON-Array aller Tools, einmalig serialisiert"""
+        if self._payload is None:
+            self._payload = bytes(self._codec.dumps(self._frozen))
+        return self._payload
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._tools
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._frozen)
+
+    def __len__(self) -> int:
+        return len(self._frozen)
@@ -0,0 +1,90 @@
+"""Tabellengesteuerte Tool-Registry: Name -> Handler, Schema und Argument-Konvertierung"""
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+from .tool_catalog import ToolCatalog
+
+Handler = Callable[..., Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """Ein registriertes Tool mit Handler und Konvertern für seine Argumente"""
+    tool: Any
+    handler: Handler
+    coerce: Mapping[str, Callable[[Any], Any]] = field(default_factory=dict)
+    # Ohne Seiteneffekte: gleiche Aufrufe innerhalb eines Batches dürfen zusammengefasst werden
+    readonly: bool = False
+
+    @property
+    def name(self) -> str:
+        return self.tool.name
+
+    def bind(self, arguments: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+        """Wandelt die rohen MCP-Argumente in Keyword-Argumente für den Handler um"""
+        arguments = arguments or {}
+        schema = self.tool.inputSchema
+        missing = [key for key in schema.get("required", ()) if key not in arguments]
+        if missing:
+            raise ValueError(f"Missing required argument(s) for {self.name}: {', '.join(missing)}")
+
+        kwargs = {}
+        for key in schema.get("properties", {}):
+            if key not in arguments:
+                continue
+            value = arguments[key]
+            convert = self.coerce.get(key)
+            if convert is not None and value is not None:
+                try:
+                    value = convert(value)
+                except (TypeError, ValueError) as e:
+                    raise ValueError(f"Invalid value for {key}: {value!r}") from e
+            kwargs[key] = value
+        return kwargs
+
+    async def __call__(self, arguments: Optional[Mapping[str, Any]]) -> Any:
+        return await self.handler(**self.bind(arguments))
+
+
+class ToolRegistry:
+    """Registry für Tool-Handler; der Tool-Katalog wird aus denselben Einträgen erzeugt"""
+    def __init__(self):
+        self._specs: Dict[str, ToolSpec] = {}
+        self.catalog = ToolCatalog()
+
+    def register(
+        self,
+        tool: Any,
+        coerce: Optional[Mapping[str, Callable[[Any], Any]]] = None,
+        readonly: bool = False,
+    ):
+        """Decorator: registriert einen Handler für das angegebene Tool"""
+        def decorator(func: Handler) -> Handler:
+            self._specs[tool.name] = ToolSpec(tool, func, dict(coerce or {}), readonly)
+            self.catalog.register(tool)
+            return func
+        return decorator
+
+    def unregister(self, name: str) -> None:
+        del self._specs[name]
+        self.catalog.remove(name)
+
+    def get(self, name: str) -> ToolSpec:
+        try:
+            return self._specs[name]
+        except KeyError:
+            raise ValueError(f"Unknown tool: {name}") from None
+
+    def is_readonly(self, name: str) -> bool:
+        spec = self._specs.get(name)
+        return spec is not None and spec.readonly
+
+    async def call(self, name: str, arguments: Optional[Mapping[str, Any]]) -> Any:
+        """Führt ein Tool über seinen registrierten Handler aus"""
+        return await self.get(name)(arguments)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._specs
+
+    def __len__(self) -> int:
+        return len(self._specs)
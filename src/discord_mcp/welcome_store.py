@@ -0,0 +1,206 @@
+"""Kompakter, persistenter Speicher für bereits begrüßte User (int64-Hashset + Append-only-Datei)"""
+import logging
+import os
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger("discord-mcp-server")
+
+# Leerer Slot; Snowflakes sind nie 0
+_EMPTY = 0
+_MIN_CAPACITY = 1024
+
+
+class IdSet:
+    """Open-Addressing-Hashset über ein array('q'): 8 Byte pro Slot statt eines int-Objekts pro Eintrag.
+
+    Lineares Sondieren, Füllgrad höchstens 1/2. Löschen wird nicht unterstützt, dafür wird neu aufgebaut.
+    """
+    __slots__ = ("_slots", "_mask", "_count")
+
+    def __init__(self, expected: int = 0):
+        capacity = _MIN_CAPACITY
+        while capacity < expected * 2:
+            capacity *= 2
+        self._slots = array('q', bytes(8 * capacity))
+        self._mask = capacity - 1
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[int]:
+        return (key for key in self._slots if key != _EMPTY)
+
+    def __contains__(self, key: int) -> bool:
+        slots = self._slots
+        mask = self._mask
+        # Die unteren Bits einer Snowflake sind Zähler/Worker, die oberen der Zeitstempel
+        index = (key ^ (key >> 22)) & mask
+        while True:
+            value = slots[index]
+            if value == key:
+                return True
+            if value == _EMPTY:
+                return False
+            index = (index + 1) & mask
+
+    def add(self, key: int) -> bool:
+        """Fügt key hinzu; False, wenn er schon enthalten war"""
+        if (self._count + 1) * 2 > len(self._slots):
+            self._grow()
+        slots = self._slots
+        mask = self._mask
+        index = (key ^ (key >> 22)) & mask
+        while True:
+            value = slots[index]
+            if value == key:
+                return False
+            if value == _EMPTY:
+                slots[index] = key
+                self._count += 1
+                return True
+            index = (index + 1) & mask
+
+    def _grow(self) -> None:
+        old = self._slots
+        self._slots = array('q', bytes(16 * len(old)))
+        self._mask = len(self._slots) - 1
+        self._count = 0
+        for key in old:
+            if key != _EMPTY:
+                self.add(key)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._slots) * self._slots.itemsize
+
+
+class WelcomedUsers:
+    """Menge der begrüßten User, die einen Neustart übersteht.
+
+    Neue IDs werden an eine Binärdatei (int64, little-endian) angehängt und beim Start per
+    Bulk-Read geladen. Wird max_users überschritten, bleiben nur die zuletzt begrüßten 3/4
+    erhalten (Datei wird kompaktiert); ältere User werden dann ggf. erneut begrüßt.
+    Ohne path, oder wenn die Datei nicht lesbar/beschreibbar ist, wird nur im Speicher gearbeitet.
+    """
+    def __init__(self, path: Optional[str] = None, max_users: int = 1_000_000):
+        self.path = path
+        self.max_users = max(1, max_users)
+        self._file = None
+        ids = array('q')
+        if path:
+            try:
+                ids = self._read()
+                self._file = open(path, "ab")
+            except OSError as e:
+                self._memory_only(f"Welcome store {path} not usable", e)
+        # Reihenfolge der Einträge für die Kompaktierung, wenn es keine Datei gibt
+        self._log: Optional[array] = None if self.path else ids
+        self._ids = IdSet(min(len(ids), self.max_users))
+        self._rebuild(ids)
+
+    def _read(self) -> array:
+        ids = array('q')
+        path = Path(self.path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return ids
+        # Abgeschnittener letzter Eintrag nach einem Absturz wird ignoriert
+        ids.frombytes(data[:len(data) - len(data) % ids.itemsize])
+        if sys.byteorder == "big":
+            ids.byteswap()
+        return ids
+
+    def _rebuild(self, ids: Iterable[int]) -> None:
+        for user_id in ids:
+            self._ids.add(user_id)
+        if len(self._ids) > self.max_users:
+            self._compact()
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, user_id: int) -> None:
+        if not self._ids.add(user_id):
+            return
+        entry = array('q', (user_id,))
+        if self._log is not None:
+            self._log.append(user_id)
+        else:
+            if sys.byteorder == "big":
+                entry.byteswap()
+            try:
+                self._file.write(entry.tobytes())
+                self._file.flush()
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not persist welcomed user {user_id}: {e}")
+        if len(self._ids) > self.max_users:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Behält die zuletzt begrüßten User und schreibt die Datei neu"""
+        ids = self._log
+        if ids is None:
+            try:
+                ids = self._read()
+            except OSError as e:
+                # Ohne lesbare Datei ist die Reihenfolge verloren; dann bleiben beliebige 3/4 erhalten
+                self._memory_only(f"Could not read welcome store {self.path}", e)
+                ids = array('q', self._ids)
+        keep = self.max_users * 3 // 4
+        newest = array('q')
+        seen = IdSet(keep)
+        # Von hinten lesen, damit Duplikate die neueste Position behalten
+        for user_id in reversed(ids):
+            if len(newest) >= keep:
+                break
+            if seen.add(user_id):
+                newest.append(user_id)
+        newest.reverse()
+        self._ids = seen
+        if self._log is not None:
+            self._log = newest
+            return
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        tmp_path = self.path + ".tmp"
+        data = array('q', newest)
+        if sys.byteorder == "big":
+            data.byteswap()
+        try:
+            with open(tmp_path, "wb") as f:
+                data.tofile(f)
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, "ab")
+        except OSError as e:
+            self._memory_only(f"Could not compact welcome store {self.path}", e)
+            self._log = newest
+            return
+        logger.info(f"Compacted welcomed users to {len(newest)} entries")
+
+    def _memory_only(self, reason: str, error: OSError) -> None:
+        """Gibt die Datei auf; begrüßte User werden ab jetzt nur noch im Speicher gehalten"""
+        logger.warning(f"{reason}, keeping welcomed users in memory only: {error}")
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.path = None
+        self._log = array('q')
+
+    def report(self) -> Dict[str, int]:
+        return {"users": len(self._ids), "max_users": self.max_users, "table_bytes": self._ids.nbytes}
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
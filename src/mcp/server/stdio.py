@@ -1,54 +1,240 @@
 import asyncio
+import os
 import sys
 from contextlib import asynccontextmanager
+from typing import List, Optional
+
+# Maximale Größe eines einzelnen Frames (Standard: 16 MiB, überschreibbar mit MCP_MAX_FRAME_SIZE)
+DEFAULT_MAX_FRAME_SIZE = 16 * 1024 * 1024
+# "line" (JSON pro Zeile) oder "content-length" (Header wie bei LSP), überschreibbar mit MCP_FRAMING
+DEFAULT_FRAMING = "line"
+
+_READ_CHUNK_SIZE = 64 * 1024
+_HEADER_END = b'\r\n\r\n'
+_MAX_HEADER_SIZE = 8 * 1024
+
+
+class FrameError(ValueError):
+    """Ein Frame konnte nicht gelesen werden"""
+
+
+class FrameTooLarge(FrameError):
+    """Ein Frame überschreitet die konfigurierte Maximalgröße"""
+
+
+class FrameDecoder:
+    """Inkrementeller Frame-Decoder über einem wachsenden Puffer.
+
+    Verbrauchte Bytes werden nur über einen Offset übersprungen und erst
+    verworfen, wenn sie mindestens die Hälfte des Puffers ausmachen - so
+    bleibt das Kopieren amortisiert linear.
+    """
+    def __init__(self, framing: str = "line", max_frame_size: int = DEFAULT_MAX_FRAME_SIZE):
+        if framing not in ("line", "content-length"):
+            raise ValueError(f"Unknown framing: {framing}")
+        self.framing = framing
+        self.max_frame_size = max_frame_size
+        self._buffer = bytearray()
+        self._start = 0
+        # Ab hier muss nach dem nächsten Trenner gesucht werden
+        self._scan = 0
+        # Bytes eines zu großen Frames, die noch verworfen werden müssen (-1 = bis Zeilenende)
+        self._skip = 0
+
+    def feed(self, data: bytes) -> None:
+        self._buffer += data
+
+    def _consume(self, end: int) -> None:
+        self._start = self._scan = end
+        if self._start and self._start * 2 >= len(self._buffer):
+            del self._buffer[:self._start]
+            self._start = self._scan = 0
+
+    def _discard(self) -> bool:
+        """Verwirft den Rest eines zu großen Frames; True wenn fertig"""
+        if self._skip == -1:
+            idx = self._buffer.find(b'\n', self._start)
+            if idx == -1:
+                self._consume(len(self._buffer))
+                return False
+            self._consume(idx + 1)
+        else:
+            available = len(self._buffer) - self._start
+            if available < self._skip:
+                self._skip -= available
+                self._consume(len(self._buffer))
+                return False
+            self._consume(self._start + self._skip)
+        self._skip = 0
+        return True
+
+    def next_frame(self) -> Optional[bytes]:
+        """Gibt den nächsten vollständigen Frame zurück oder None"""
+        if self._skip and not self._discard():
+            return None
+        if self.framing == "line":
+            return self._next_line()
+        return self._next_content_length()
+
+    def _next_line(self) -> Optional[bytes]:
+        idx = self._buffer.find(b'\n', self._scan)
+        if idx == -1:
+            self._scan = len(self._buffer)
+            size = self._scan - self._start
+            if size > self.max_frame_size:
+                self._skip = -1
+                self._discard()
+                raise FrameTooLarge(f"Frame exceeds {self.max_frame_size} bytes")
+            return None
+        if idx + 1 - self._start > self.max_frame_size:
+            self._consume(idx + 1)
+            raise FrameTooLarge(f"Frame exceeds {self.max_frame_size} bytes")
+        frame = bytes(self._buffer[self._start:idx + 1])
+        self._consume(idx + 1)
+        return frame
+
+    def _next_content_length(self) -> Optional[bytes]:
+        header_end = self._buffer.find(_HEADER_END, max(self._start, self._scan - 3))
+        if header_end == -1:
+            self._scan = len(self._buffer)
+            if self._scan - self._start > _MAX_HEADER_SIZE:
+                self._consume(len(self._buffer))
+                raise FrameTooLarge("Frame header too large")
+            return None
+
+        body_start = header_end + len(_HEADER_END)
+        length = None
+        for line in bytes(self._buffer[self._start:header_end]).split(b'\r\n'):
+            key, _, value = line.partition(b':')
+            if key.strip().lower() == b'content-length' and value.strip().isdigit():
+                length = int(value.strip())
+        if length is None:
+            self._consume(body_start)
+            raise FrameError("Missing or invalid Content-Length header")
+
+        if length > self.max_frame_size:
+            self._consume(body_start)
+            self._skip = length
+            self._discard()
+            raise FrameTooLarge(f"Frame exceeds {self.max_frame_size} bytes")
+        if len(self._buffer) - body_start < length:
+            # Header erst erneut parsen, wenn der Body vollständig ist
+            self._scan = header_end
+            return None
+        frame = bytes(self._buffer[body_start:body_start + length])
+        self._consume(body_start + length)
+        return frame
+
+    def flush(self) -> Optional[bytes]:
+        """Liefert bei EOF den unvollständigen Rest (nur im Zeilenmodus)"""
+        rest = bytes(self._buffer[self._start:])
+        self._buffer.clear()
+        self._start = self._scan = 0
+        if self.framing == "line" and rest and not self._skip:
+            return rest
+        return None
+
+
+class FrameReader:
+    """Liest vollständige Frames aus einem Stream, auch als async Iterator"""
+    def __init__(
+        self,
+        stream,
+        framing: str = DEFAULT_FRAMING,
+        max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+        chunk_size: int = _READ_CHUNK_SIZE,
+    ):
+        self._stream = stream
+        self._decoder = FrameDecoder(framing, max_frame_size)
+        self._chunk_size = chunk_size
+        self._eof = False
+
+    async def _read_chunk(self) -> bytes:
+        if hasattr(self._stream, 'read'):
+            return await self._stream.read(self._chunk_size)
+        elif hasattr(self._stream, 'receive'):
+            try:
+                return await self._stream.receive()
+            except Exception:
+                return b''
+        return b''
+
+    async def read_frame(self) -> bytes:
+        """Nächster Frame; b'' bei EOF"""
+        while True:
+            frame = self._decoder.next_frame()
+            if frame:
+                return frame
+            if frame is not None:
+                # Leerer Frame (Content-Length: 0) - überspringen
+                continue
+            if self._eof:
+                return self._decoder.flush() or b''
+            data = await self._read_chunk()
+            if not data:
+                self._eof = True
+                continue
+            self._decoder.feed(data)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        frame = await self.read_frame()
+        if not frame:
+            raise StopAsyncIteration
+        return frame
 
-async def _read_from_stream(stream):
-    """Liest asynchron aus einem beliebigen Stream"""
-    if hasattr(stream, 'readline'):
-        return await stream.readline()
-    elif hasattr(stream, 'receive'):
-        try:
-            return await stream.receive()
-        except Exception:
-            return b''
-    return b''
-
-async def _write_to_stream(stream, data):
-    """Schreibt asynchron in einen beliebigen Stream"""
-    if hasattr(stream, 'write'):
-        stream.write(data)
-        await stream.drain()
-    elif hasattr(stream, 'send'):
-        await stream.send(data)
 
 class StreamAdapter:
     """Universal Stream Adapter"""
-    def __init__(self, stream):
+    def __init__(
+        self,
+        stream,
+        framing: str = DEFAULT_FRAMING,
+        max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+    ):
         self._stream = stream
-        self._buffer = bytearray()
+        self._reader = FrameReader(stream, framing, max_frame_size)
+        self._framing = framing
+        # Gepufferte Ausgabe, wird mit einem drain() pro Burst geschrieben
+        self._pending: List[bytes] = []
 
     async def readline(self):
-        """Liest eine Zeile aus dem Stream"""
-        data = await _read_from_stream(self._stream)
-        if not data:
-            return b''
-        self._buffer.extend(data)
-        
-        if b'\n' in self._buffer:
-            idx = self._buffer.index(b'\n') + 1
-            line = bytes(self._buffer[:idx])
-            del self._buffer[:idx]
-            return line
-        return data
-
-    async def write(self, data):
-        """Schreibt Daten in den Stream"""
-        await _write_to_stream(self._stream, data)
+        """Liest den nächsten vollständigen Frame aus dem Stream"""
+        return await self._reader.read_frame()
+
+    def __aiter__(self):
+        return self._reader
+
+    def write(self, data):
+        """Puffert einen Frame; geschrieben wird beim nächsten drain()"""
+        self.writelines((data,))
+
+    def writelines(self, chunks):
+        """Puffert einen aus mehreren Teilen bestehenden Frame ohne sie zusammenzukopieren"""
+        if self._framing == "content-length":
+            chunks = list(chunks)
+            if chunks and chunks[-1].endswith(b'\n'):
+                chunks[-1] = memoryview(chunks[-1])[:-1]
+            self._pending.append(b'Content-Length: %d\r\n\r\n' % sum(len(c) for c in chunks))
+        self._pending.extend(chunks)
 
     async def drain(self):
-        """Wartet bis alle Daten geschrieben sind"""
+        """Schreibt alle gepufferten Daten und wartet bis sie geschrieben sind"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
         if hasattr(self._stream, 'drain'):
+            # asyncio StreamWriter
+            self._stream.writelines(pending)
             await self._stream.drain()
+        elif hasattr(self._stream, 'send'):
+            await self._stream.send(b''.join(pending))
+        else:
+            # Binärer Dateistream (z.B. sys.stdout.buffer)
+            self._stream.write(b''.join(pending))
+            self._stream.flush()
 
     def close(self):
         """Schließt den Stream"""
@@ -61,23 +247,35 @@ class StreamAdapter:
             await self._stream.wait_closed()
 
 @asynccontextmanager
-async def stdio_server():
+async def stdio_server(framing: Optional[str] = None, max_frame_size: Optional[int] = None):
     """Stream-Handler für verschiedene Stream-Typen"""
+    # Umgebung erst hier lesen, damit Werte aus einer später geladenen .env greifen
+    framing = framing or os.getenv("MCP_FRAMING") or DEFAULT_FRAMING
+    max_frame_size = max_frame_size or int(os.getenv("MCP_MAX_FRAME_SIZE") or DEFAULT_MAX_FRAME_SIZE)
     try:
         # Verwende direkte Streams für stdin/stdout
-        loop = asyncio.get_event_loop()
-        reader = asyncio.StreamReader()
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=max_frame_size)
         protocol = asyncio.StreamReaderProtocol(reader)
-        
+
         if sys.platform == 'win32':
             await loop.connect_read_pipe(lambda: protocol, sys.stdin.buffer)
+            writer = sys.stdout.buffer
         else:
             await loop.connect_read_pipe(lambda: protocol, sys.stdin)
-        
+            try:
+                transport, write_protocol = await loop.connect_write_pipe(
+                    asyncio.streams.FlowControlMixin, sys.stdout
+                )
+                writer = asyncio.StreamWriter(transport, write_protocol, reader, loop)
+            except ValueError:
+                # stdout ist keine Pipe (z.B. umgeleitet in eine Datei)
+                writer = sys.stdout.buffer
+
         # Wrapper für ein- und ausgehende Streams
-        read_adapter = StreamAdapter(reader)
-        write_adapter = StreamAdapter(sys.stdout.buffer if sys.platform == 'win32' else sys.stdout)
-        
+        read_adapter = StreamAdapter(reader, framing, max_frame_size)
+        write_adapter = StreamAdapter(writer, framing, max_frame_size)
+
         yield read_adapter, write_adapter
     except Exception as e:
         print(f"Error setting up stdio server: {e}", file=sys.stderr)